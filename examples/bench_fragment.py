@@ -0,0 +1,40 @@
+"""Benchmark: inserting a large list by Element.create/append vs HtmlFragment."""
+
+import sys
+import time
+
+import sciter
+from sciter.dom import Element, HtmlFragment
+
+
+def by_elements(ul, rows):
+    for i, name in rows:
+        li = Element.create("li", name)
+        li.set_attribute("data-id", i)
+        ul.append(li)
+
+
+def by_fragment(ul, rows):
+    frag = HtmlFragment('<li data-id="{0}">{1}</li>')
+    frag.add_rows(rows).append_to(ul)
+
+
+def measure(name, fn, ul, rows):
+    ul.clear()
+    start = time.perf_counter()
+    fn(ul, rows)
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:>7} rows: {:8.1f} ms, {} children".format(name, len(rows), elapsed * 1000, ul.children_count()))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = [(i, "item <%d> & co" % i) for i in range(count)]
+
+    frame = sciter.Window(ismain=True, uni_theme=True)
+    frame.load_html(b"""<html><body><ul id="list"></ul></body></html>""")
+    ul = frame.get_root().find_first("#list")
+
+    measure("elements", by_elements, ul, rows)
+    measure("fragment", by_fragment, ul, rows)
+    ul.clear()
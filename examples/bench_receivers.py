@@ -0,0 +1,44 @@
+"""Benchmark: a new StringReceiver per call vs the pooled per-thread receivers."""
+
+import sys
+import timeit
+
+import sciter
+from sciter.capi.scdef import StringReceiver, string_receiver
+
+_api = sciter.SciterAPI()
+
+
+def get_text_fresh(el):
+    # the old way: a new ctypes callback thunk for every call
+    cb = StringReceiver('wchar')
+    _api.SciterGetElementTextCB(el, cb, None)
+    return cb.text
+
+
+def get_text_pooled(el):
+    cb = string_receiver('wchar')
+    _api.SciterGetElementTextCB(el, cb, None)
+    return cb.text
+
+
+def report(name, fn, number):
+    elapsed = min(timeit.repeat(fn, number=number, repeat=3))
+    print("{:<24} {:8.3f} us/call".format(name, elapsed / number * 1e6))
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    report("receiver: new", lambda: StringReceiver('wchar'), number)
+    report("receiver: pooled", lambda: string_receiver('wchar'), number)
+
+    frame = sciter.Window(ismain=True, uni_theme=True)
+    frame.load_html(b"""<html><body><p id="p">hello, world</p></body></html>""")
+    p = frame.get_root().find_first("#p")
+
+    report("get_text: new", lambda: get_text_fresh(p), number)
+    report("get_text: pooled", lambda: get_text_pooled(p), number)
+    report("Element.get_text", p.get_text, number)
+    report("Element.get_tag", p.get_tag, number)
+    report("Element.attribute", lambda: p.attribute('id'), number)
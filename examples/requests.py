@@ -0,0 +1,69 @@
+"""Many widgets requesting the same endpoints through the window request scheduler, served by a local test server."""
+
+import threading
+import time
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import sciter
+
+WIDGETS = 40
+ENDPOINTS = ("/cpu", "/memory", "/disk", "/network")
+
+
+class Endpoint(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        Endpoint.hits[self.path] = Endpoint.hits.get(self.path, 0) + 1
+        time.sleep(0.2)     # slow backend
+        body = ("<b>%s</b> at %.3f" % (self.path, time.time())).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Frame(sciter.Window):
+
+    def __init__(self, base):
+        super().__init__(ismain=True, uni_theme=True)
+        self.base = base
+        self.arrived = 0
+        pass
+
+    def document_complete(self):
+        widgets = self.get_root().find_all("div.widget")
+        for i, widget in enumerate(widgets):
+            url = self.base + ENDPOINTS[i % len(ENDPOINTS)]
+            # the first widget of each endpoint is the most important one
+            priority = 1 if i < len(ENDPOINTS) else 0
+            self.requests.request_data(widget, url, callback=self.on_widget_data, priority=priority)
+        print("queued:", len(self.requests), self.requests.stats)
+        pass
+
+    def on_widget_data(self, params):
+        self.arrived += 1
+        if self.arrived == WIDGETS:
+            print("requests:", self.requests.stats)
+            print("server hits:", Endpoint.hits)
+            for url, stat in sorted(self.requests.latency.items()):
+                print("{:<32} {:3} x {:7.1f} ms avg, {:7.1f} ms max".format(url, stat['count'], stat['total'] / stat['count'], stat['max']))
+        pass
+
+    pass
+
+
+if __name__ == "__main__":
+    server = HTTPServer(("127.0.0.1", 0), Endpoint)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    frame = Frame("http://127.0.0.1:%d" % server.server_port)
+    frame.requests.max_concurrent = 2
+    frame.load_html(("<html><body>%s</body></html>" % ("<div class='widget'>...</div>" * WIDGETS)).encode('utf-8'))
+    frame.run_app()
+    server.shutdown()
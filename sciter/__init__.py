@@ -24,6 +24,7 @@ from .window import Window
 from .dom import Element
 from .event import EventHandler
 from .error import SciterError, ScriptError, ScriptException
+from .executor import set_executor, get_executor, executor_stats
 
 sapi = api = SciterAPI()
 gapi = sapi.GetSciterGraphicsAPI if sapi else None
@@ -75,7 +76,8 @@ def runtime_features(file_io=True, socket_io=True, allow_eval=True, allow_sysinf
         flags += SCRIPT_RUNTIME_FEATURES.ALLOW_SYSINFO
     return set_option(SCITER_RT_OPTIONS.SCITER_SET_SCRIPT_RUNTIME_FEATURES, flags)
 
-def script(name=None, convert=True, safe=True, threading=False, promise=False):
+def script(name=None, convert=True, safe=True, threading=False, promise=False, process=False, executor=None, concurrency=None,
+           supersede=False):
     """Annotation decorator for the functions that called from script."""
     # @script def -> script(def)
     # @script('name') def -> script(name)(def)
@@ -84,13 +86,24 @@ def script(name=None, convert=True, safe=True, threading=False, promise=False):
     # `safe`: Pass exceptions to Sciter or ignore them
     # `threading`: Call the handler in a separate thread (concurrent.futures.ThreadPoolExecutor)
     # `promise`: Call the handler in a separate thread as a promise
-    if threading and promise:
-        raise SciterError("Don't mix `threading` and `promise` in @script")
+    # `process`: Call the handler in a worker process as a promise (concurrent.futures.ProcessPoolExecutor),
+    #   the handler gets no `self` (make it a @staticmethod, in any decorator order),
+    #   its arguments and result must be picklable
+    # `executor`: Name of the executor for `threading`, `promise` and `process` handlers (see `set_executor`)
+    # `concurrency`: Maximum number of the pending calls of this handler, the rest are busy
+    # `supersede`: Cancel the previous pending call of `promise` and `process` handlers
+    if (threading, promise, process).count(True) > 1:
+        raise SciterError("Don't mix `threading`, `promise` and `process` in @script")
+    if process and not convert:
+        raise SciterError("`process` handlers need converted arguments")
 
     def decorator(func):
         attr = True if name is None else name
-        func._from_sciter = attr
-        func._sciter_cfg = dict(name=name, convert=convert, safe=safe, threading=threading, promise=promise)
+        # mark the function itself: dispatch finds the function of @staticmethod, not the wrapper
+        target = func.__func__ if isinstance(func, (staticmethod, classmethod)) else func
+        target._from_sciter = attr
+        target._sciter_cfg = dict(name=name, convert=convert, safe=safe, threading=threading, promise=promise,
+                                  process=process, executor=executor, concurrency=concurrency, supersede=supersede)
         return func
 
     # script('name')
@@ -102,7 +115,7 @@ def script(name=None, convert=True, safe=True, threading=False, promise=False):
     name = None
     return decorator(func)
 
-def async_script(name=None, convert=True, safe=True):
+def async_script(name=None, convert=True, safe=True, executor=None, concurrency=None, supersede=False):
     """Annotation decorator for async functions that called from script."""
     # @async_script def -> async_script(def)
     # @async_script('name') def -> async_script(name)(def)
@@ -110,11 +123,17 @@ def async_script(name=None, convert=True, safe=True):
     # `convert`: Convert Sciter values to Python types
     # `safe`: Pass exceptions to Sciter or ignore them
     # `promise`: Call the handler in a separate thread as a promise (always true)
+    # `executor`: Name of the executor (see `set_executor`)
+    # `concurrency`: Maximum number of the pending calls of this handler, the rest are busy
+    # `supersede`: Cancel the previous pending call of this handler
+    # The script call returns a function which cancels the call and rejects the promise.
 
     def decorator(func):
         attr = True if name is None else name
-        func._from_sciter = attr
-        func._sciter_cfg = dict(name=name, convert=convert, safe=safe, threading=False, promise=True)
+        target = func.__func__ if isinstance(func, (staticmethod, classmethod)) else func
+        target._from_sciter = attr
+        target._sciter_cfg = dict(name=name, convert=convert, safe=safe, threading=False, promise=True,
+                                  executor=executor, concurrency=concurrency, supersede=supersede)
         return func
 
     # async_script('name')
@@ -0,0 +1,166 @@
+"""asyncio integration: runs an asyncio event loop cooperatively inside the sciter message loop.
+
+The loop is driven from an element timer of the window document: on every tick it runs
+the ready callbacks and polls I/O without blocking, so coroutines run on the UI thread.
+
+    frame = sciter.Window(ismain=True)
+    frame.load_file("index.htm")
+    sciter.aio.run_app(frame, main())
+"""
+
+import asyncio
+
+import sciter.event
+
+from sciter.capi.scbehavior import EVENT_GROUPS
+
+_driver = None
+
+
+def get_loop():
+    """Get the asyncio loop driven by the sciter message loop or None if not installed."""
+    return _driver.loop if _driver is not None else None
+
+
+def install(window, loop=None, interval=10):
+    """Drive the asyncio loop (a new one by default) from the window message loop, `interval` is the tick in ms."""
+    global _driver
+    if _driver is not None:
+        raise sciter.SciterError("asyncio loop is already installed")
+    if loop is None:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    _driver = LoopDriver(window, loop, interval)
+    return loop
+
+
+def uninstall():
+    """Stop driving the asyncio loop, it is not closed."""
+    global _driver
+    if _driver is not None:
+        _driver.close()
+        _driver = None
+    pass
+
+
+def run_app(window, main=None, interval=10):
+    """Run the window message loop together with an asyncio loop, `main` is an optional coroutine to start."""
+    loop = install(window, interval=interval)
+    try:
+        if main is not None:
+            loop.create_task(main)
+        return window.run_app()
+    finally:
+        try:
+            uninstall()
+        finally:
+            # the loop is cleaned up even if the window is gone already
+            _shutdown(loop)
+    pass
+
+
+def create_task(coro):
+    """Schedule coroutine on the driven loop."""
+    loop = get_loop()
+    if loop is None:
+        raise sciter.SciterError("asyncio loop is not installed, see sciter.aio.install()")
+    return loop.create_task(coro)
+
+
+def _shutdown(loop):
+    # cancel the leftovers and let them finish
+    all_tasks = getattr(asyncio, 'all_tasks', None) or asyncio.Task.all_tasks
+    tasks = [task for task in all_tasks(loop) if not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    asyncio.set_event_loop(None)
+    loop.close()
+    pass
+
+
+class LoopDriver(sciter.event.EventHandler):
+    """Follows the window documents and keeps a loop ticker on the root element of each."""
+
+    def __init__(self, window, loop, interval=10):
+        self.loop = loop
+        self.interval = interval
+        self.stats = dict(ticks=0)
+        self._ticker = None
+        super().__init__(window=window.hwnd, subscription=EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT)
+        root = window.get_root()
+        if root:
+            self._start(root)
+        pass
+
+    def close(self):
+        """Stop ticking and detach from the window, the window may be destroyed already."""
+        try:
+            self._stop()
+        except sciter.SciterError:
+            pass    # the document is gone with the window
+        try:
+            self.detach()
+        except sciter.SciterError:
+            pass
+        return self
+
+    def document_complete(self):
+        self._start(self.element)
+        pass
+
+    def document_close(self):
+        self._stop()
+        pass
+
+    def step(self):
+        """Run one iteration of the asyncio loop: ready callbacks and non-blocking I/O poll."""
+        loop = self.loop
+        if loop.is_running() or loop.is_closed():
+            return
+        self.stats['ticks'] += 1
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        pass
+
+    def _start(self, root):
+        self._stop()
+        self._ticker = _LoopTicker(self, root)
+        pass
+
+    def _stop(self):
+        ticker, self._ticker = self._ticker, None
+        if ticker is not None:
+            ticker.close()
+        pass
+
+    pass
+
+
+class _LoopTicker(sciter.event.EventHandler):
+    """Element timer which drives the loop."""
+
+    def __init__(self, driver, element):
+        self.driver = driver
+        self._target = element
+        self._timer_id = id(self)
+        super().__init__(element=element, subscription=EVENT_GROUPS.HANDLE_TIMER)
+        element.start_timer(driver.interval, self._timer_id)
+        pass
+
+    def close(self):
+        try:
+            self._target.stop_timer(self._timer_id)
+        finally:
+            self.detach()
+        pass
+
+    def on_timer(self, timerId):
+        if timerId != self._timer_id:
+            return None
+        self.driver.step()
+        return True     # keep ticking
+
+    pass
@@ -1,6 +1,7 @@
 """Common Sciter declarations."""
 
 import enum
+import threading
 
 from ctypes import *
 
@@ -185,6 +186,7 @@ DEBUG_OUTPUT_PROC = SC_CALLBACK(VOID, LPVOID, UINT, UINT, LPCWSTR, UINT)
 LPCSTR_RECEIVER = SC_CALLBACK(VOID, LPCSTR, UINT, LPVOID)
 LPCWSTR_RECEIVER = SC_CALLBACK(VOID, LPCWSTR, UINT, LPVOID)
 LPCBYTE_RECEIVER = SC_CALLBACK(VOID, LPCBYTE, UINT, LPVOID)
+LPCBYTE_BUFFER_RECEIVER = SC_CALLBACK(VOID, LPVOID, UINT, LPVOID)  # LPCBYTE_RECEIVER which gets the raw pointer
 
 SciterElementCallback = SC_CALLBACK(BOOL, HELEMENT, LPVOID)
 
@@ -203,20 +205,27 @@ ELEMENT_BITMAP_RECEIVER = SC_CALLBACK(VOID, LPCBYTE, INT, INT, UINT, UINT, LPVOI
 class StringReceiver():
     """LPCWSTR_RECEIVER wrapper."""
 
-    def __init__(self, string_type: str):
-        """Construct callback by one of 'char', 'wchar' or 'byte' string type."""
+    def __init__(self, string_type: str, raw=False):
+        """Construct callback by one of 'char', 'wchar' or 'byte' string type, 'byte' can be kept `raw` as bytes."""
         self.text = None
+        self.raw = raw
         if string_type == 'char':
             self.cb = LPCSTR_RECEIVER(self._a2s)
         elif string_type == 'byte':
-            self.cb = LPCBYTE_RECEIVER(self._b2s)
+            # the raw pointer: `n` bytes which may contain NULs
+            self.cb = LPCBYTE_BUFFER_RECEIVER(self._b2s)
         elif string_type == 'wchar':
             self.cb = LPCWSTR_RECEIVER(self._w2s)
         else:
             raise ValueError("Unknown callback type. Use one of 'char', 'byte' or 'wchar'.")
-        self._as_parameter_ = self.cb
+        self._as_parameter_ = cast(self.cb, LPCBYTE_RECEIVER) if string_type == 'byte' else self.cb
         pass
 
+    def reset(self):
+        """Forget the last received string."""
+        self.text = None
+        return self
+
     def _w2s(self, sz, n, ctx):
         # wchar_t
         self.text = sz if SCITER_WIN else sz.value
@@ -227,8 +236,67 @@ class StringReceiver():
         self.text = sz.decode('utf-8')
         pass
 
-    def _b2s(self, sz, n, ctx):
+    def _b2s(self, p, n, ctx):
         # byte
-        self.text = sz.decode('utf-8')
+        data = string_at(p, n) if p else b''
+        self.text = data if self.raw else data.decode('utf-8')
         pass
     pass
+
+
+class BufferReceiver():
+    """LPCBYTE_RECEIVER wrapper which hands the received buffer to `sink` as bytes.
+
+    With `copy=False` the sink gets a memoryview over the native buffer instead. The view is valid
+    during the sink call only and is released after it, so the sink must copy what it keeps.
+    """
+
+    def __init__(self, sink, copy=True):
+        """Construct callback which calls `sink(bytes)` (or `sink(memoryview)`), e.g. `fileobj.write`."""
+        self.sink = sink
+        self.copy = copy
+        self.size = 0
+        self.error = None
+        self.cb = LPCBYTE_BUFFER_RECEIVER(self._recv)
+        self._as_parameter_ = cast(self.cb, LPCBYTE_RECEIVER)
+        pass
+
+    def _recv(self, p, n, ctx):
+        if self.error is not None or not p or not n:
+            return
+        try:
+            if self.copy:
+                self.sink(string_at(p, n))
+            else:
+                with memoryview((c_char * n).from_address(p)) as view:
+                    self.sink(view)
+            self.size += n
+        except Exception as e:
+            # exceptions can't cross the native callback, keep it for the caller
+            self.error = e
+        pass
+
+    def throw_if_failed(self):
+        """Raise the exception raised by `sink` during the call, if any."""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return self
+    pass
+
+
+_receivers = threading.local()
+
+
+def string_receiver(string_type: str, raw=False) -> StringReceiver:
+    """Get a reset StringReceiver from the pool of the current thread.
+
+    The receiver is shared, so read its `text` right after the API call which filled it.
+    """
+    pool = _receivers.__dict__
+    key = (string_type, raw)
+    cb = pool.get(key)
+    if cb is None:
+        cb = pool[key] = StringReceiver(string_type, raw)
+    cb.text = None
+    return cb
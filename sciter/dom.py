@@ -1,13 +1,21 @@
 """DOM access methods."""
 
+import time
+import array
+import heapq
+import bisect
 import ctypes
+import collections
+
+from html import escape as html_escape
 
 import sciter.error
+import sciter.event
 import sciter.capi.scdef
 
 from sciter.capi.scdom import *
 from sciter.capi.screquest import SciterResourceType
-from sciter.capi.scbehavior import BEHAVIOR_EVENTS, CLICK_REASON
+from sciter.capi.scbehavior import BEHAVIOR_EVENTS, CLICK_REASON, DATA_ARRIVED_PARAMS, EVENT_GROUPS, PHASE_MASK
 
 _api = sciter.SciterAPI()
 
@@ -19,18 +27,14 @@ _api = sciter.SciterAPI()
 # SciterCallBehaviorMethod
 # SciterCombineURL
 # SciterControlGetType
-# SciterGetElementIntrinsicHeight
-# SciterGetElementIntrinsicWidths
 # SciterGetElementNamespace
 # SciterGetElementType
 # SciterGetObject
 # SciterHidePopup
-# SciterNodeCastFromElement
 # SciterSelectElementsW
 # SciterSelectParentW
 # SciterShowPopup
 # SciterShowPopupAt
-# SciterSortElements
 # SciterTraverseUIEvent
 #
 
@@ -48,6 +52,20 @@ class DomError(sciter.error.SciterError):
     pass
 
 
+IntrinsicSize = collections.namedtuple('IntrinsicSize', 'min_width max_width height')
+ElementSnapshot = collections.namedtuple('ElementSnapshot', 'uid tag attributes text state children')
+SNAPSHOT_FIELDS = ('uid', 'tag', 'attributes', 'text', 'state')
+
+# active StyleCache objects, invalidated on style mutations through Element
+_style_caches = set()
+
+# elements whose text content is not escaped in html
+_RAW_TEXT_TAGS = frozenset(('script', 'style', 'xmp', 'iframe', 'noembed', 'noframes', 'noscript', 'plaintext'))
+
+# utf-8 encoded style attribute names
+_style_names = {}
+
+
 class Node:
     """DOM node - element, comment, text."""
 
@@ -96,10 +114,14 @@ class Node:
         """Test object for None."""
         return self.h is not None
 
-    def __length__(self):
+    def __len__(self):
         """Node children count."""
         return self.children_count()
 
+    def __iter__(self):
+        """Iterate over the child nodes."""
+        return self.iter_children()
+
     def __getitem__(self, key):
         """Get node child at specified index."""
         if not isinstance(key, int):
@@ -168,6 +190,49 @@ class Node:
         self._throw_if(ok)
         return n.value
 
+    def iter_children(self):
+        """Iterate over the child nodes."""
+        p = HNODE()
+        ok = _api.SciterNodeFirstChild(self, ctypes.byref(p))
+        h = p.value if ok == SCDOM_RESULT.SCDOM_OK else None
+        while h:
+            yield Node(HNODE(h))
+            ok = _api.SciterNodeNextSibling(h, ctypes.byref(p))
+            h = p.value if ok == SCDOM_RESULT.SCDOM_OK else None
+        pass
+
+    def walk(self, kinds=None):
+        """Iterate over all descendant nodes in document order, optionally only of the given NODE_TYPE(s)."""
+        for h, _ in Node._walk(self, kinds):
+            yield Node(HNODE(h))
+        pass
+
+    @staticmethod
+    def _walk(node, kinds=None):
+        # pre-order traversal over the raw node handles, yields (handle, NODE_TYPE) pairs
+        if isinstance(kinds, int):
+            kinds = (kinds,)
+        first, following, typeof = _api.SciterNodeFirstChild, _api.SciterNodeNextSibling, _api.SciterNodeType
+        p = HNODE()
+        n = ctypes.c_uint()
+        ok = first(node, ctypes.byref(p))
+        stack = [p.value if ok == SCDOM_RESULT.SCDOM_OK else None]
+        while stack:
+            h = stack.pop()
+            if not h:
+                continue
+            ok = typeof(h, ctypes.byref(n))
+            Node._throw_if(ok)
+            kind = n.value
+            ok = following(h, ctypes.byref(p))
+            stack.append(p.value if ok == SCDOM_RESULT.SCDOM_OK else None)
+            if kind == NODE_TYPE.NT_ELEMENT:
+                ok = first(h, ctypes.byref(p))
+                stack.append(p.value if ok == SCDOM_RESULT.SCDOM_OK else None)
+            if kinds is None or kind in kinds:
+                yield h, NODE_TYPE(kind)
+        pass
+
     def get_type(self):
         """Get node type (text, comment or element)."""
         n = ctypes.c_uint()
@@ -235,7 +300,7 @@ class Node:
 
     def get_text(self):
         """Get contents of text/comment node."""
-        cb = sciter.capi.scdef.StringReceiver('wchar')
+        cb = sciter.capi.scdef.string_receiver('wchar')
         ok = _api.SciterNodeGetText(self, cb, None)
         self._throw_if(ok)
         return cb.text
@@ -360,7 +425,7 @@ class Element:
         """Test object for None."""
         return self.h is not None
 
-    def __length__(self):
+    def __len__(self):
         """Element children count."""
         return self.children_count()
 
@@ -420,13 +485,14 @@ class Element:
 
     def get_tag(self):
         """Return element tag as string (e.g. 'div', 'body')."""
-        cb = sciter.capi.scdef.StringReceiver('char')
+        cb = sciter.capi.scdef.string_receiver('char')
         ok = _api.SciterGetElementTypeCB(self, cb, None)
         self._throw_if(ok)
         return cb.text
 
     def clear(self):
         """Clear content of the element."""
+        _invalidate_styles(self.h.value)
         ok = _api.SciterSetElementText(self, None, 0)
         self._throw_if(ok)
         return self
@@ -447,24 +513,86 @@ class Element:
 
     def get_text(self) -> str:
         """Get inner text of the element as string."""
-        cb = sciter.capi.scdef.StringReceiver('wchar')
+        cb = sciter.capi.scdef.string_receiver('wchar')
         ok = _api.SciterGetElementTextCB(self, cb, None)
         self._throw_if(ok)
         return cb.text
 
     def set_text(self, text: str):
         """Set inner text of the element."""
+        _invalidate_styles(self.h.value)
         ok = _api.SciterSetElementText(self, text, len(text))
         self._throw_if(ok)
         return self
 
+    def text_content(self, include_comments=False) -> str:
+        """Get concatenated text of all descendant text (and optionally comment) nodes."""
+        node = self._as_node()
+        kinds = (NODE_TYPE.NT_TEXT, NODE_TYPE.NT_COMMENT) if include_comments else (NODE_TYPE.NT_TEXT,)
+        cb = sciter.capi.scdef.string_receiver('wchar')
+        parts = []
+        for h, _ in Node._walk(node, kinds):
+            ok = _api.SciterNodeGetText(h, cb, None)
+            self._throw_if(ok)
+            parts.append(cb.text)
+        return ''.join(parts)
+
+    def _as_node(self):
+        p = HNODE()
+        ok = _api.SciterNodeCastFromElement(self, ctypes.byref(p))
+        self._throw_if(ok)
+        return Node(p)
+
     def get_html(self, outer=True) -> bytes:
         """Get html representation of the element as utf-8 bytes."""
-        cb = sciter.capi.scdef.StringReceiver('byte')
+        cb = sciter.capi.scdef.string_receiver('byte')
         ok = _api.SciterGetElementHtmlCB(self, outer, cb, None)
         self._throw_if(ok)
         return cb.text
 
+    def write_html(self, fileobj, outer=True, chunked=False) -> int:
+        """Write html of the element as utf-8 bytes to the binary file-like object, return number of bytes written.
+
+        With `chunked` the html is exported child by child, so only one child is held in memory at a time.
+        """
+        if chunked and self.children_count():
+            return self._write_html_chunked(fileobj, outer)
+        cb = sciter.capi.scdef.BufferReceiver(fileobj.write)
+        ok = _api.SciterGetElementHtmlCB(self, outer, cb, None)
+        self._throw_if(ok)
+        cb.throw_if_failed()
+        return cb.size
+
+    def _write_html_chunked(self, fileobj, outer):
+        size = 0
+
+        def put(text):
+            data = text.encode('utf-8')
+            fileobj.write(data)
+            return len(data)
+
+        tag = self.get_tag()
+        raw = tag in _RAW_TEXT_TAGS
+        if outer:
+            attrs = ''.join(' %s="%s"' % (name, html_escape(value)) for name, value in self.attributes().items())
+            size += put('<%s%s>' % (tag, attrs))
+        cb = sciter.capi.scdef.BufferReceiver(fileobj.write)
+        for child in self._as_node().iter_children():
+            kind = child.get_type()
+            if kind == NODE_TYPE.NT_ELEMENT:
+                ok = _api.SciterGetElementHtmlCB(child.to_element(), True, cb, None)
+                self._throw_if(ok)
+                cb.throw_if_failed()
+            elif kind == NODE_TYPE.NT_TEXT:
+                text = child.get_text()
+                size += put(text if raw else html_escape(text, False))
+            else:
+                size += put('<!--%s-->' % child.get_text())
+        size += cb.size
+        if outer:
+            size += put('</%s>' % tag)
+        return size
+
     def set_html(self, html: bytes, where=SET_ELEMENT_HTML.SIH_REPLACE_CONTENT):
         """Set inner or outer html of the element."""
         if not html:
@@ -472,6 +600,7 @@ class Element:
             return self
         if not isinstance(html, bytes):
             raise TypeError("html must be a bytes type")
+        _invalidate_styles(self.h.value)
         ok = _api.SciterSetElementHtml(self, html, len(html), where)
         self._throw_if(ok)
         return self
@@ -497,6 +626,25 @@ class Element:
         self._throw_if(ok)
         return rc
 
+    def intrinsic_widths(self):
+        """Get min-intrinsic and max-intrinsic widths of the element."""
+        mn, mx = ctypes.c_int(), ctypes.c_int()
+        ok = _api.SciterGetElementIntrinsicWidths(self, ctypes.byref(mn), ctypes.byref(mx))
+        self._throw_if(ok)
+        return mn.value, mx.value
+
+    def intrinsic_height(self, width: int):
+        """Get intrinsic height of the element for the given width."""
+        h = ctypes.c_int()
+        ok = _api.SciterGetElementIntrinsicHeight(self, width, ctypes.byref(h))
+        self._throw_if(ok)
+        return h.value
+
+    def intrinsic_size(self, width=None):
+        """Get intrinsic widths and the height for `width` (max-intrinsic width by default)."""
+        mn, mx = self.intrinsic_widths()
+        return IntrinsicSize(mn, mx, self.intrinsic_height(mx if width is None else width))
+
     def request_data(self, url: str, data_type=SciterResourceType.RT_DATA_HTML, initiator=None):
         """Request data download for this element."""
         ok = _api.SciterRequestElementData(self, url, data_type, initiator)
@@ -600,14 +748,14 @@ class Element:
 
     def attribute_name(self, n):
         """Get attribute name by its index."""
-        cb = sciter.capi.scdef.StringReceiver('char')
+        cb = sciter.capi.scdef.string_receiver('char')
         ok = _api.SciterGetNthAttributeNameCB(self, n, cb, None)
         self._throw_if(ok)
         return cb.text
 
     def attribute(self, name_or_index, default=None):
         """Get attribute value by its name or index."""
-        cb = sciter.capi.scdef.StringReceiver('wchar')
+        cb = sciter.capi.scdef.string_receiver('wchar')
         if isinstance(name_or_index, int):
             ok = _api.SciterGetNthAttributeValueCB(self, name_or_index, cb, None)
         elif isinstance(name_or_index, str):
@@ -619,16 +767,40 @@ class Element:
         self._throw_if(ok)
         return cb.text
 
+    def attributes(self) -> dict:
+        """Get all attributes of the element as {name: value} dict."""
+        names = sciter.capi.scdef.string_receiver('char')
+        values = sciter.capi.scdef.string_receiver('wchar')
+        return Element._attributes(self, names, values)
+
+    @staticmethod
+    def _attributes(he, names, values):
+        # one pass over the attributes of element or raw HELEMENT with the same receivers
+        n = ctypes.c_uint()
+        ok = _api.SciterGetAttributeCount(he, ctypes.byref(n))
+        Element._throw_if(ok)
+        rv = {}
+        for i in range(n.value):
+            names.text = values.text = None
+            ok = _api.SciterGetNthAttributeNameCB(he, i, names, None)
+            Element._throw_if(ok)
+            ok = _api.SciterGetNthAttributeValueCB(he, i, values, None)
+            Element._throw_if(ok)
+            rv[names.text] = values.text
+        return rv
+
     def set_attribute(self, name: str, val: str):
         """Add or replace attribute."""
         ok = _api.SciterSetAttributeByName(self, name.encode('utf-8'), str(val))
         self._throw_if(ok)
+        _invalidate_styles(self.h.value)
         return self
 
     def remove_attribute(self, name: str):
         """Remove attribute."""
         ok = _api.SciterSetAttributeByName(self, name.encode('utf-8'), None)
         self._throw_if(ok)
+        _invalidate_styles(self.h.value)
         return self
 
     def toggle_attribute(self, name: str, isset: bool, val=''):
@@ -643,6 +815,7 @@ class Element:
         """Remove all attributes from the element."""
         ok = _api.SciterClearAttributes(self)
         self._throw_if(ok)
+        _invalidate_styles(self.h.value)
         return self
 
 
@@ -650,17 +823,44 @@ class Element:
 
     def style_attribute(self, name: str):
         """Get style attribute of the element by its name."""
-        cb = sciter.capi.scdef.StringReceiver('wchar')
-        ok = _api.SciterGetStyleAttributeCB(self, name.encode('utf-8'), cb, None)
+        cb = sciter.capi.scdef.string_receiver('wchar')
+        ok = _api.SciterGetStyleAttributeCB(self, _style_name(name), cb, None)
         self._throw_if(ok)
         return cb.text
 
     def set_style_attribute(self, name: str, val: str):
         """Set style attribute."""
-        ok = _api.SciterSetStyleAttribute(self, name.encode('utf-8'), val)
+        ok = _api.SciterSetStyleAttribute(self, _style_name(name), val)
         self._throw_if(ok)
+        _invalidate_styles(self.h.value)
+        return self
+
+    def get_styles(self, names, cache=None) -> dict:
+        """Get style attributes by names as dict, optionally read through the StyleCache."""
+        if cache is not None:
+            return cache.get(self, names)
+        return Element._styles(self.h, names)
+
+    def set_styles(self, styles: dict):
+        """Set many style attributes at once, `None` value resets the attribute."""
+        he, fn = self.h, _api.SciterSetStyleAttribute
+        for name, val in styles.items():
+            ok = fn(he, _style_name(name), None if val is None else str(val))
+            self._throw_if(ok)
+        _invalidate_styles(self.h.value)
         return self
 
+    @staticmethod
+    def _styles(he, names):
+        cb = sciter.capi.scdef.string_receiver('wchar')
+        fn = _api.SciterGetStyleAttributeCB
+        rv = {}
+        for name in names:
+            ok = fn(he, _style_name(name), cb.reset(), None)
+            Element._throw_if(ok)
+            rv[name] = cb.text
+        return rv
+
 
     ## @name State methods:
 
@@ -668,6 +868,7 @@ class Element:
         """Set UI state of the element with optional view update."""
         ok = _api.SciterSetElementState(self, set_bits, clear_bits, update)
         self._throw_if(ok)
+        _invalidate_styles(self.h.value)
         return self
 
     def state(self):
@@ -764,6 +965,7 @@ class Element:
 
     def insert(self, child, index: int):
         """Insert element at index position of this element."""
+        _invalidate_styles(child.h.value)
         ok = _api.SciterInsertElement(child.h, self.h, index)
         self._throw_if(ok)
         return self
@@ -774,6 +976,7 @@ class Element:
 
     def detach(self):
         """Take element out of its container (and DOM tree)."""
+        _invalidate_styles(self.h.value)
         ok = _api.SciterDetachElement(self.h)
         self._throw_if(ok)
         return self
@@ -782,16 +985,50 @@ class Element:
         """Take element out of its container (and DOM tree) and force destruction of all behaviors."""
         tmp = self.h
         self.h = None
+        _invalidate_styles(tmp.value)
         ok = _api.SciterDeleteElement(tmp)
         self._throw_if(ok)
         return self
 
     def swap(self, el):
         """Swap element positions."""
+        _invalidate_styles(self.h.value)
+        _invalidate_styles(el.h.value)
         ok = _api.SciterSwapElements(self, el)
         self._throw_if(ok)
         return self
 
+    def sort_children(self, key, start=0, end=None, reverse=False):
+        """Sort child elements in [start, end) range by `key(element)`, keys are computed once per child."""
+        if end is None:
+            end = self.children_count()
+        keys = {}
+        for i in range(start, end):
+            # a new handle per child: `key` may keep the element
+            p = HELEMENT()
+            ok = _api.SciterGetNthChild(self, i, ctypes.byref(p))
+            self._throw_if(ok)
+            keys[p.value] = key(Element(p))
+        sign = -1 if reverse else 1
+        errors = []
+
+        def on_compare(he1, he2, param):
+            # exceptions can't pass the native sort, raise the first one after it
+            try:
+                a, b = keys[he1], keys[he2]
+                return sign * ((a > b) - (a < b))
+            except Exception as e:
+                if not errors:
+                    errors.append(e)
+                return 0
+
+        cmp = sciter.capi.scdef.ELEMENT_COMPARATOR(on_compare)
+        ok = _api.SciterSortElements(self, start, end, cmp, None)
+        if errors:
+            raise errors[0]
+        self._throw_if(ok)
+        return self
+
     def test(self, selector: str) -> bool:
         """Test this element against CSS selector(s)."""
         found = HELEMENT()
@@ -837,6 +1074,15 @@ class Element:
         self.select_elements(on_element, selector)
         return rv
 
+    def snapshot(self, depth=None, fields=SNAPSHOT_FIELDS, flat=False):
+        """Capture the subtree in one traversal as nested ElementSnapshot tuples or as flat columns.
+
+        `depth=0` captures this element only, `fields` is a subset of SNAPSHOT_FIELDS,
+        text is captured for the elements without children only.
+        Flat layout is a dict of columns (lists) with additional 'parent' (row index) and 'depth' columns.
+        """
+        return _Snapshot(fields, flat).capture(self, depth)
+
 
     ## @name Scroll methods:
 
@@ -928,3 +1174,1313 @@ class Element:
         raise DomError(code, "Element." + context)
 
     pass
+
+
+def collect_attributes(elements) -> list:
+    """Get attributes of every element as list of {name: value} dicts."""
+    names = sciter.capi.scdef.string_receiver('char')
+    values = sciter.capi.scdef.string_receiver('wchar')
+    return [Element._attributes(el, names, values) for el in elements]
+
+
+def measure(elements, areas=ELEMENT_AREAS.ROOT_RELATIVE | ELEMENT_AREAS.BORDER_BOX, memo=None) -> array.array:
+    """Get locations of many elements as packed array of ints.
+
+    `areas` is one ELEMENT_AREAS kind or a sequence of them; the result holds
+    `left, top, right, bottom` for each element and each area in order.
+    `memo` is an optional MeasureMemo reused between calls during a frame.
+    """
+    kinds = (int(areas),) if isinstance(areas, int) else tuple(int(kind) for kind in areas)
+    rv = array.array('i')
+    rc = sciter.capi.sctypes.RECT()
+    prc = ctypes.byref(rc)
+    fn = _api.SciterGetElementLocation
+    cache = memo.rects() if memo is not None else None
+    for el in elements:
+        he = el.h if isinstance(el, Element) else el
+        for kind in kinds:
+            if cache is not None:
+                key = (getattr(he, 'value', he), kind)
+                rect = cache.get(key)
+                if rect is None:
+                    ok = fn(he, prc, kind)
+                    Element._throw_if(ok)
+                    rect = cache[key] = (rc.left, rc.top, rc.right, rc.bottom)
+                    memo.stats['misses'] += 1
+                else:
+                    memo.stats['hits'] += 1
+                rv.extend(rect)
+            else:
+                ok = fn(he, prc, kind)
+                Element._throw_if(ok)
+                rv.extend((rc.left, rc.top, rc.right, rc.bottom))
+    return rv
+
+
+class MeasureMemo:
+    """Memo of element locations for `measure()`, valid during one frame only."""
+
+    def __init__(self, frame=16):
+        """Create memo, cached locations expire `frame` ms after the first measurement."""
+        super().__init__()
+        self.frame = frame / 1000.0
+        self.stats = dict(hits=0, misses=0, frames=0)
+        self._rects = {}
+        self._started = None
+        pass
+
+    def __len__(self):
+        """Number of the memorized locations."""
+        return len(self._rects)
+
+    def clear(self):
+        """Forget all locations, e.g. after a DOM change during the frame."""
+        self._rects = {}
+        self._started = None
+        return self
+
+    def rects(self) -> dict:
+        """Get memorized locations of the current frame, keyed by (element handle, area kind)."""
+        now = time.monotonic()
+        if self._started is None or now - self._started >= self.frame:
+            self._rects = {}
+            self._started = now
+            self.stats['frames'] += 1
+        return self._rects
+
+    pass
+
+
+class _Snapshot:
+    """Subtree traversal for Element.snapshot() with the same receivers and buffers for every element."""
+
+    def __init__(self, fields, flat):
+        unknown = set(fields) - set(SNAPSHOT_FIELDS)
+        if unknown:
+            raise ValueError("Unknown snapshot fields: " + ", ".join(sorted(unknown)))
+        self.fields = fields
+        self.flat = flat
+        self.columns = None
+        self._char = sciter.capi.scdef.string_receiver('char')
+        self._wchar = sciter.capi.scdef.string_receiver('wchar')
+        self._n = ctypes.c_uint()
+        self._p = HELEMENT()
+        pass
+
+    def capture(self, element, depth):
+        if self.flat:
+            self.columns = {name: [] for name in self.fields}
+            self.columns['parent'] = []
+            self.columns['depth'] = []
+        rv = self._capture(element.h, 0, depth, -1)
+        return self.columns if self.flat else rv
+
+    def _capture(self, he, level, depth, parent):
+        fields, n, p = self.fields, self._n, self._p
+        uid = tag = attributes = text = state = None
+
+        ok = _api.SciterGetChildrenCount(he, ctypes.byref(n))
+        Element._throw_if(ok)
+        count = n.value
+        if 'uid' in fields:
+            ok = _api.SciterGetElementUID(he, ctypes.byref(n))
+            Element._throw_if(ok)
+            uid = n.value
+        if 'tag' in fields:
+            ok = _api.SciterGetElementTypeCB(he, self._char.reset(), None)
+            Element._throw_if(ok)
+            tag = self._char.text
+        if 'attributes' in fields:
+            attributes = Element._attributes(he, self._char, self._wchar)
+        if 'text' in fields and count == 0:
+            ok = _api.SciterGetElementTextCB(he, self._wchar.reset(), None)
+            Element._throw_if(ok)
+            text = self._wchar.text
+        if 'state' in fields:
+            ok = _api.SciterGetElementState(he, ctypes.byref(n))
+            Element._throw_if(ok)
+            state = n.value
+
+        expand = depth is None or level < depth
+        if self.flat:
+            columns = self.columns
+            row = len(columns['parent'])
+            columns['parent'].append(parent)
+            columns['depth'].append(level)
+            for name, val in zip(SNAPSHOT_FIELDS, (uid, tag, attributes, text, state)):
+                if name in fields:
+                    columns[name].append(val)
+            parent = row
+
+        children = [] if expand else None
+        if expand:
+            for i in range(count):
+                ok = _api.SciterGetNthChild(he, i, ctypes.byref(p))
+                Element._throw_if(ok)
+                child = self._capture(HELEMENT(p.value), level + 1, depth, parent)
+                if not self.flat:
+                    children.append(child)
+        if self.flat:
+            return None
+        return ElementSnapshot(uid, tag, attributes, text, state, children)
+
+    pass
+
+
+def _snapshot_rows(snap):
+    # {uid: ((parent uid, index), {field: value})} and the captured field names for both snapshot layouts
+    rows = {}
+    if isinstance(snap, dict):
+        if 'uid' not in snap:
+            raise ValueError("snapshot_diff requires snapshots with 'uid' field")
+        uids = snap['uid']
+        names = [name for name in SNAPSHOT_FIELDS if name in snap and name != 'uid']
+        counters = {}
+        for row, uid in enumerate(uids):
+            parent = snap['parent'][row]
+            index = counters.get(parent, 0)
+            counters[parent] = index + 1
+            values = {name: snap[name][row] for name in names}
+            rows[uid] = ((uids[parent] if parent >= 0 else None, index), values)
+        return rows, frozenset(names)
+
+    def walk(node, parent, index):
+        if node.uid is None:
+            raise ValueError("snapshot_diff requires snapshots with 'uid' field")
+        rows[node.uid] = ((parent, index), dict(tag=node.tag, attributes=node.attributes, text=node.text, state=node.state))
+        for i, child in enumerate(node.children or ()):
+            walk(child, node.uid, i)
+    walk(snap, None, 0)
+    # nested snapshots keep None for the fields which were not captured
+    names = frozenset(name for name in SNAPSHOT_FIELDS[1:] if any(values[name] is not None for _, values in rows.values()))
+    for _, values in rows.values():
+        for name in SNAPSHOT_FIELDS[1:]:
+            if name not in names:
+                del values[name]
+    return rows, names
+
+
+def _retained_order(items):
+    # uids of the longest run of (new index, old index, uid) items, sorted by new index, keeping the old order
+    tails, ends, prev = [], [], [None] * len(items)
+    for i, (_, old, _) in enumerate(items):
+        j = bisect.bisect_left(tails, old)
+        if j:
+            prev[i] = ends[j - 1]
+        if j == len(tails):
+            tails.append(old)
+            ends.append(i)
+        else:
+            tails[j] = old
+            ends[j] = i
+    rv = []
+    i = ends[-1] if ends else None
+    while i is not None:
+        rv.append(items[i][2])
+        i = prev[i]
+    return rv
+
+
+def snapshot_diff(old, new) -> list:
+    """Compare two Element.snapshot() captures (with 'uid' field), return list of changes.
+
+    Changes are ('added', uid, values), ('removed', uid, values),
+    ('moved', uid, ((old parent uid, old index), (new parent uid, new index)))
+    and ('changed', uid, {field: (old value, new value)}) tuples.
+    Element is moved if its parent changed or it left the order of the siblings present in both captures,
+    so an insertion or removal alone moves nothing. Both captures must have the same fields.
+    """
+    a, a_fields = _snapshot_rows(old)
+    b, b_fields = _snapshot_rows(new)
+    if a_fields != b_fields:
+        raise ValueError("snapshot_diff requires snapshots with the same fields")
+
+    siblings = {}   # parent uid -> [(new index, old index, uid)] of the retained children
+    for uid, (pos, values) in b.items():
+        other = a.get(uid)
+        if other is not None and other[0][0] == pos[0]:
+            siblings.setdefault(pos[0], []).append((pos[1], other[0][1], uid))
+    kept = set()
+    for items in siblings.values():
+        items.sort()
+        kept.update(_retained_order(items))
+
+    changes = []
+    for uid, (pos, values) in a.items():
+        other = b.get(uid)
+        if other is None:
+            changes.append(('removed', uid, values))
+            continue
+        if uid not in kept:
+            changes.append(('moved', uid, (pos, other[0])))
+        if other[1] != values:
+            delta = {name: (val, other[1][name]) for name, val in values.items() if other[1][name] != val}
+            changes.append(('changed', uid, delta))
+    for uid, (pos, values) in b.items():
+        if uid not in a:
+            changes.append(('added', uid, values))
+    return changes
+
+
+class HtmlFragment:
+    """Builder of escaped html rows which are inserted into the DOM by a single `SciterSetElementHtml` call."""
+
+    def __init__(self, template: str = None):
+        """Construct builder with optional row template, e.g. '<li data-id={id}>{name}</li>'."""
+        super().__init__()
+        self.template = template
+        self._parts = []
+        pass
+
+    def __len__(self):
+        """Number of added rows."""
+        return len(self._parts)
+
+    def __bool__(self):
+        """Test if anything was added."""
+        return len(self._parts) != 0
+
+    @staticmethod
+    def escape(text) -> str:
+        """Escape text for html content or attribute value."""
+        return html_escape(str(text), quote=True)
+
+    def add(self, *args, **kwargs):
+        """Add row formatted by template with escaped positional or keyword values."""
+        if self.template is None:
+            raise ValueError("HtmlFragment has no row template")
+        esc = self.escape
+        args = [esc(v) for v in args]
+        kwargs = {k: esc(v) for k, v in kwargs.items()}
+        self._parts.append(self.template.format(*args, **kwargs))
+        return self
+
+    def add_rows(self, rows):
+        """Add rows formatted by template, each row is a dict, tuple or a single value."""
+        for row in rows:
+            if isinstance(row, dict):
+                self.add(**row)
+            elif isinstance(row, (tuple, list)):
+                self.add(*row)
+            else:
+                self.add(row)
+        return self
+
+    def add_element(self, tag: str, text=None, attributes=None):
+        """Add element with escaped text and attributes."""
+        esc = self.escape
+        attrs = ''.join(' %s="%s"' % (name, esc(val)) for name, val in attributes.items()) if attributes else ''
+        body = esc(text) if text is not None else ''
+        self._parts.append('<%s%s>%s</%s>' % (tag, attrs, body, tag))
+        return self
+
+    def add_html(self, html):
+        """Add raw html (str or utf-8 bytes) without escaping."""
+        self._parts.append(html.decode('utf-8') if isinstance(html, bytes) else html)
+        return self
+
+    def clear(self):
+        """Drop all added rows."""
+        self._parts = []
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Get the whole fragment as utf-8 bytes."""
+        return ''.join(self._parts).encode('utf-8')
+
+    def insert(self, element: Element, where=SET_ELEMENT_HTML.SIH_APPEND_AFTER_LAST, handles=False):
+        """Insert fragment to the element, return list of inserted child elements if `handles` requested."""
+        data = self.to_bytes()
+        if not data:
+            return [] if handles else None
+
+        container = None
+        if handles:
+            # remember the insertion position to find the inserted children afterwards
+            if where in (SET_ELEMENT_HTML.SOH_INSERT_BEFORE, SET_ELEMENT_HTML.SOH_INSERT_AFTER, SET_ELEMENT_HTML.SOH_REPLACE):
+                container = element.parent()
+                start = element.index() + (1 if where == SET_ELEMENT_HTML.SOH_INSERT_AFTER else 0)
+            else:
+                container = element
+                start = element.children_count() if where == SET_ELEMENT_HTML.SIH_APPEND_AFTER_LAST else 0
+            count = container.children_count() if container else 0
+
+        if where in (SET_ELEMENT_HTML.SIH_REPLACE_CONTENT, SET_ELEMENT_HTML.SOH_REPLACE):
+            _invalidate_styles(element.h.value)
+
+        # not `Element.set_html` because it clears the element on empty html
+        ok = _api.SciterSetElementHtml(element, data, len(data), where)
+        Element._throw_if(ok)
+        if not container:
+            return [] if handles else None
+
+        added = container.children_count() - count
+        if where in (SET_ELEMENT_HTML.SIH_REPLACE_CONTENT, SET_ELEMENT_HTML.SOH_REPLACE):
+            added += count if where == SET_ELEMENT_HTML.SIH_REPLACE_CONTENT else 1
+
+        rv = []
+        for i in range(start, start + added):
+            p = HELEMENT()
+            ok = _api.SciterGetNthChild(container, i, ctypes.byref(p))
+            Element._throw_if(ok)
+            rv.append(Element(p))
+        return rv
+
+    def append_to(self, element: Element, handles=False):
+        """Insert fragment after the last child of the element."""
+        return self.insert(element, SET_ELEMENT_HTML.SIH_APPEND_AFTER_LAST, handles)
+
+    def prepend_to(self, element: Element, handles=False):
+        """Insert fragment before the first child of the element."""
+        return self.insert(element, SET_ELEMENT_HTML.SIH_INSERT_AT_START, handles)
+
+    def insert_before(self, element: Element, handles=False):
+        """Insert fragment before the element (as its previous siblings)."""
+        return self.insert(element, SET_ELEMENT_HTML.SOH_INSERT_BEFORE, handles)
+
+    def insert_after(self, element: Element, handles=False):
+        """Insert fragment after the element (as its next siblings)."""
+        return self.insert(element, SET_ELEMENT_HTML.SOH_INSERT_AFTER, handles)
+
+    pass
+
+
+class VirtualList:
+    """Virtualized list: only the visible rows (plus overscan) of a large data source exist in the DOM."""
+
+    def __init__(self, element: Element, source, count=None, render=None, row_height=None, row_tag='div', overscan=4):
+        """Attach list to the scrollable element.
+
+        `source` is a sequence or a `callable(index)` with explicit `count`,
+        `render(row_element, index, data)` fills the recycled row element (sets its text by default),
+        `row_height` is measured from the first row if not given.
+        """
+        super().__init__()
+        if count is None:
+            if callable(source):
+                raise ValueError("count is required for callable source")
+            count = len(source)
+        self.element = element
+        self.source = source
+        self.count = count
+        self.render = render if render is not None else VirtualList._render_text
+        self.row_height = row_height
+        self.row_tag = row_tag
+        self.overscan = overscan
+        self.first = 0
+        self.rows = []
+        self._spacers = [-1, -1]
+        self._pos = sciter.capi.sctypes.POINT()
+        self._view = sciter.capi.sctypes.RECT()
+        self._size = sciter.capi.sctypes.SIZE()
+
+        # layout: <head spacer> rows... <tail spacer>
+        element.clear()
+        self._head = Element.create(row_tag)
+        self._tail = Element.create(row_tag)
+        element.append(self._head)
+        element.append(self._tail)
+        self._handler = _VirtualListHandler(self)
+        self.update()
+        pass
+
+    def close(self):
+        """Stop tracking the element scroll events."""
+        if self._handler:
+            self._handler.detach()
+            self._handler = None
+        return self
+
+    def update(self):
+        """Materialize rows of the visible window, called on scroll and resize."""
+        count = self.count
+        if count and not self.row_height:
+            self._layout(0, 1)
+            rc = self.rows[0].get_location(ELEMENT_AREAS.SELF_RELATIVE | ELEMENT_AREAS.MARGIN_BOX)
+            if rc.bottom <= rc.top:
+                # not laid out yet: keep the probe row only, measure again on the next size or scroll event
+                return self
+            self.row_height = rc.bottom - rc.top
+        height = self.row_height or 1
+
+        ok = _api.SciterGetScrollInfo(self.element, ctypes.byref(self._pos), ctypes.byref(self._view), ctypes.byref(self._size))
+        Element._throw_if(ok)
+        view = self._view.bottom - self._view.top
+
+        first = max(0, self._pos.y // height - self.overscan)
+        visible = (view + height - 1) // height + 1 + self.overscan * 2
+        first = max(0, min(first, count - visible))
+        self._layout(first, min(visible, count - first))
+        return self
+
+    def refresh(self, count=None):
+        """Data changed: re-render all visible rows, optionally with a new rows count."""
+        if count is not None:
+            self.count = count
+        elif not callable(self.source):
+            self.count = len(self.source)
+        for i, row in enumerate(self.rows):
+            if self.first + i < self.count:
+                self._render(row, self.first + i)
+        return self.update()
+
+    def refresh_row(self, index: int):
+        """Data of row changed: re-render it if visible."""
+        pos = index - self.first
+        if 0 <= pos < len(self.rows):
+            self._render(self.rows[pos], index)
+        return self
+
+    def row(self, index: int):
+        """Get materialized row element at the data index or None if the row is out of view."""
+        pos = index - self.first
+        return self.rows[pos] if 0 <= pos < len(self.rows) else None
+
+    def scroll_to(self, index: int, smooth=False):
+        """Scroll the list to the row at data index."""
+        height = self.row_height or 1
+        self.element.set_scroll_pos(self._pos.x, index * height, smooth)
+        return self.update()
+
+    def _layout(self, first, n):
+        element, rows = self.element, self.rows
+        shift = first - self.first
+        stale = range(len(rows))
+
+        # recycle the rows that went out of view to the other end
+        if 0 < shift < len(rows):
+            last = len(rows)
+            for row in rows[:shift]:
+                row.detach()
+                element.insert(row, last)
+            rows[:] = rows[shift:] + rows[:shift]
+            stale = range(last - shift, last)
+        elif 0 < -shift < len(rows):
+            for row in reversed(rows[shift:]):
+                row.detach()
+                element.insert(row, 1)
+            rows[:] = rows[shift:] + rows[:shift]
+            stale = range(0, -shift)
+        elif shift == 0:
+            stale = range(0)
+
+        # grow or shrink the pool of the rows
+        while len(rows) > n:
+            rows.pop().destroy()
+        fresh = range(len(rows), n)
+        for i in fresh:
+            row = Element.create(self.row_tag)
+            element.insert(row, 1 + i)
+            rows.append(row)
+
+        self.first = first
+        for i in stale:
+            if i < n:
+                self._render(rows[i], first + i)
+        for i in fresh:
+            self._render(rows[i], first + i)
+
+        height = self.row_height or 0
+        self._set_spacer(0, self._head, first * height)
+        self._set_spacer(1, self._tail, (self.count - first - n) * height)
+        pass
+
+    def _set_spacer(self, which, spacer, height):
+        if self._spacers[which] != height:
+            self._spacers[which] = height
+            spacer.set_style_attribute('height', '%dpx' % height)
+        pass
+
+    def _render(self, row, index):
+        data = self.source(index) if callable(self.source) else self.source[index]
+        self.render(row, index, data)
+        pass
+
+    @staticmethod
+    def _render_text(row, index, data):
+        row.set_text(str(data))
+        pass
+
+    pass
+
+
+class _VirtualListHandler(sciter.event.EventHandler):
+    """Routes scroll and size events of the list element to VirtualList."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        super().__init__(element=owner.element, subscription=EVENT_GROUPS.HANDLE_SCROLL | EVENT_GROUPS.HANDLE_SIZE)
+        pass
+
+    def on_scroll(self, params):
+        self.owner.update()
+        pass
+
+    def on_size(self):
+        self.owner.update()
+        pass
+
+    pass
+
+
+class LogView:
+    """Append-only log view: lines are buffered and appended once per frame, the oldest lines are evicted over the cap."""
+
+    def __init__(self, element: Element, max_lines=10000, interval=16, follow=True, line_tag='div'):
+        """Attach log to the element.
+
+        `max_lines` caps the number of line elements, `interval` is the flush period in ms,
+        `follow` keeps the view pinned to the bottom while it is scrolled to the end.
+        """
+        super().__init__()
+        self.element = element
+        self.max_lines = max_lines
+        self.interval = max(1, int(interval))
+        self.follow = follow
+        self.stats = dict(ingested=0, flushed=0, evicted=0, flushes=0)
+        self._fragment = HtmlFragment('<%s>{0}</%s>' % (line_tag, line_tag))
+        self._pending = collections.deque(maxlen=max_lines)
+        self._lines = element.children_count()
+        self._since = time.monotonic()
+        self._scheduled = False
+        self._timer_id = id(self)
+        self._pos = sciter.capi.sctypes.POINT()
+        self._view = sciter.capi.sctypes.RECT()
+        self._size = sciter.capi.sctypes.SIZE()
+        self._handler = _LogViewHandler(self)
+        pass
+
+    def __len__(self):
+        """Number of the shown and pending lines."""
+        return min(self.max_lines, self._lines + len(self._pending))
+
+    def close(self):
+        """Flush the pending lines and stop tracking the element."""
+        if self._handler:
+            self.flush()
+            self.element.stop_timer(self._timer_id)
+            self._handler.detach()
+            self._handler = None
+        return self
+
+    def write(self, line):
+        """Add line, it is shown on the next flush."""
+        pending = self._pending
+        if len(pending) == pending.maxlen:
+            self.stats['evicted'] += 1
+        pending.append(str(line))
+        self.stats['ingested'] += 1
+        self._schedule()
+        return self
+
+    def extend(self, lines):
+        """Add many lines."""
+        pending = self._pending
+        lines = [str(line) for line in lines]
+        self.stats['evicted'] += max(0, len(pending) + len(lines) - pending.maxlen)
+        self.stats['ingested'] += len(lines)
+        pending.extend(lines)
+        if lines:
+            self._schedule()
+        return self
+
+    def clear(self):
+        """Remove all shown and pending lines."""
+        self._pending.clear()
+        self.element.clear()
+        self._lines = 0
+        return self
+
+    def flush(self):
+        """Append the pending lines right now."""
+        self._scheduled = False
+        pending = self._pending
+        if not pending:
+            return self
+        n = len(pending)
+        element = self.element
+
+        # evict the oldest lines before the append to keep the DOM under the cap
+        excess = self._lines + n - self.max_lines
+        if excess > 0 and excess >= self._lines:
+            self.stats['evicted'] += self._lines
+            element.clear()
+            self._lines = 0
+        elif excess > 0:
+            self._trim(excess)
+
+        pinned = self.follow and self._at_bottom()
+        frag = self._fragment
+        for line in pending:
+            frag.add(line)
+        pending.clear()
+        frag.append_to(element)
+        frag.clear()
+        self._lines += n
+        self.stats['flushed'] += n
+        self.stats['flushes'] += 1
+
+        if pinned:
+            last = HELEMENT()
+            ok = _api.SciterGetNthChild(element, self._lines - 1, ctypes.byref(last))
+            Element._throw_if(ok)
+            Element(last).scroll_to_view()
+        return self
+
+    def rates(self) -> dict:
+        """Throughput in lines per second since the creation or the last `reset_stats()`."""
+        elapsed = max(time.monotonic() - self._since, 1e-9)
+        return dict(ingested=self.stats['ingested'] / elapsed, flushed=self.stats['flushed'] / elapsed)
+
+    def reset_stats(self):
+        """Reset counters and throughput measurement."""
+        for key in self.stats:
+            self.stats[key] = 0
+        self._since = time.monotonic()
+        return self
+
+    def _schedule(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self.element.start_timer(self.interval, self._timer_id)
+        pass
+
+    def _trim(self, count):
+        # delete the first children by raw handles, no wrappers needed
+        p = HELEMENT()
+        for _ in range(count):
+            ok = _api.SciterGetNthChild(self.element, 0, ctypes.byref(p))
+            Element._throw_if(ok)
+            ok = _api.SciterDeleteElement(p)
+            Element._throw_if(ok)
+        self._lines -= count
+        self.stats['evicted'] += count
+        pass
+
+    def _at_bottom(self):
+        ok = _api.SciterGetScrollInfo(self.element, ctypes.byref(self._pos), ctypes.byref(self._view), ctypes.byref(self._size))
+        Element._throw_if(ok)
+        view = self._view.bottom - self._view.top
+        return self._pos.y + view >= self._size.cy - 1
+
+    pass
+
+
+class _LogViewHandler(sciter.event.EventHandler):
+    """Routes the flush timer of the log element to LogView."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        super().__init__(element=owner.element, subscription=EVENT_GROUPS.HANDLE_TIMER)
+        pass
+
+    def on_timer(self, timerId):
+        if timerId != self.owner._timer_id:
+            return None
+        self.owner.flush()
+        return False    # stop the timer, it is started again by the next write
+
+    pass
+
+
+class SpatialIndex:
+    """Grid index of element rectangles (border boxes) for hit-testing with a single call to the engine per query.
+
+    Rectangles are kept relative to the indexed element, so scrolling of its ancestors doesn't stale them.
+    """
+
+    def __init__(self, element: Element, selector='*', cell=64):
+        """Index descendants of the element matching the selector, `cell` is the grid cell size in px.
+
+        The index is rebuilt lazily on the next query after the element was resized, scrolled or changed.
+        """
+        super().__init__()
+        self.element = element
+        self.selector = selector
+        self.cell = cell
+        self.stats = dict(builds=0, queries=0)
+        self._elements = None
+        self._rects = None
+        self._grid = None
+        self._handler = _SpatialIndexHandler(self)
+        pass
+
+    def __len__(self):
+        """Number of the indexed elements, builds the index."""
+        if self._elements is None:
+            self._build()
+        return len(self._elements)
+
+    def __bool__(self):
+        """Index is always true, unlike its empty `len()`."""
+        return True
+
+    def close(self):
+        """Stop tracking the element events and drop the index."""
+        if self._handler:
+            self._handler.detach()
+            self._handler = None
+        self.invalidate()
+        return self
+
+    def invalidate(self):
+        """Drop the index, it will be rebuilt on the next query."""
+        self._elements = None
+        self._rects = None
+        self._grid = None
+        return self
+
+    def at_point(self, x: int, y: int) -> list:
+        """Get elements containing the point in root coordinates, the topmost (last in document order) first."""
+        if self._grid is None:
+            self._build()
+        self.stats['queries'] += 1
+        ox, oy = self._origin()
+        x, y = x - ox, y - oy
+        rects, cell = self._rects, self.cell
+        hits = []
+        for i in reversed(self._grid.get((x // cell, y // cell), ())):
+            k = i * 4
+            if rects[k] <= x < rects[k + 2] and rects[k + 1] <= y < rects[k + 3]:
+                hits.append(self._elements[i])
+        return hits
+
+    def element_at(self, x: int, y: int):
+        """Get the topmost element containing the point or None."""
+        hits = self.at_point(x, y)
+        return hits[0] if hits else None
+
+    def in_rect(self, left: int, top: int, right: int, bottom: int) -> list:
+        """Get elements intersecting the rectangle in root coordinates, in document order."""
+        if self._grid is None:
+            self._build()
+        self.stats['queries'] += 1
+        ox, oy = self._origin()
+        left, top, right, bottom = left - ox, top - oy, right - ox, bottom - oy
+        rects, cell, grid = self._rects, self.cell, self._grid
+        found = set()
+        for cx in range(left // cell, (right - 1) // cell + 1):
+            for cy in range(top // cell, (bottom - 1) // cell + 1):
+                found.update(grid.get((cx, cy), ()))
+        hits = []
+        for i in sorted(found):
+            k = i * 4
+            if rects[k] < right and left < rects[k + 2] and rects[k + 1] < bottom and top < rects[k + 3]:
+                hits.append(self._elements[i])
+        return hits
+
+    def _build(self):
+        elements = self.element.find_all(self.selector)
+        rects = measure(elements, ELEMENT_AREAS.ROOT_RELATIVE | ELEMENT_AREAS.BORDER_BOX)
+        # relative to the element: valid until the element itself scrolls or changes
+        ox, oy = self._origin()
+        for k in range(0, len(rects), 4):
+            rects[k] -= ox
+            rects[k + 1] -= oy
+            rects[k + 2] -= ox
+            rects[k + 3] -= oy
+        cell = self.cell
+        grid = {}
+        for i in range(len(elements)):
+            left, top, right, bottom = rects[i * 4:i * 4 + 4]
+            if right <= left or bottom <= top:
+                continue    # hidden or empty
+            for cx in range(left // cell, (right - 1) // cell + 1):
+                for cy in range(top // cell, (bottom - 1) // cell + 1):
+                    grid.setdefault((cx, cy), []).append(i)
+        self._elements, self._rects, self._grid = elements, rects, grid
+        self.stats['builds'] += 1
+        pass
+
+    def _origin(self):
+        rc = self.element.get_location(ELEMENT_AREAS.ROOT_RELATIVE | ELEMENT_AREAS.BORDER_BOX)
+        return rc.left, rc.top
+
+    pass
+
+
+class _SpatialIndexHandler(sciter.event.EventHandler):
+    """Invalidates SpatialIndex when the element layout changes."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        subscription = EVENT_GROUPS.HANDLE_SIZE | EVENT_GROUPS.HANDLE_SCROLL | EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT
+        super().__init__(element=owner.element, subscription=subscription)
+        pass
+
+    def on_size(self):
+        self.owner.invalidate()
+        return False
+
+    def on_scroll(self, params):
+        self.owner.invalidate()
+        return False
+
+    def on_event(self, source, target, code, phase, reason):
+        if code in (BEHAVIOR_EVENTS.CONTENT_CHANGED, BEHAVIOR_EVENTS.VISIUAL_STATUS_CHANGED,
+                    BEHAVIOR_EVENTS.ELEMENT_COLLAPSED, BEHAVIOR_EVENTS.ELEMENT_EXPANDED):
+            self.owner.invalidate()
+        return False
+
+    pass
+
+
+class RequestScheduler:
+    """Queue of element data requests with a concurrency cap, priorities and merging of identical requests.
+
+    Identical HTML requests of different elements are sent once, the arrived html is set to every
+    merged element; requests of other data types are merged for the same element only.
+    Data is delivered to the `callback(params: DATA_ARRIVED_PARAMS)` of every merged request;
+    `params` are valid during the call only.
+    """
+
+    def __init__(self, max_concurrent=6):
+        """Create scheduler which keeps at most `max_concurrent` requests in flight."""
+        super().__init__()
+        self.max_concurrent = max_concurrent
+        self.stats = dict(submitted=0, merged=0, sent=0, completed=0)
+        self.latency = {}           # url -> dict(count, total, max, last) in ms
+        self._queue = []            # heap of (-priority, seq, request)
+        self._pending = {}          # key -> queued request
+        self._inflight = {}         # key -> sent request
+        self._handlers = {}         # element handle -> _RequestHandler
+        self._seq = 0
+        pass
+
+    def __len__(self):
+        """Number of the queued and in-flight requests."""
+        return len(self._pending) + len(self._inflight)
+
+    def close(self):
+        """Drop the queued requests and stop tracking the in-flight ones."""
+        for handler in self._handlers.values():
+            handler.detach()
+        self._handlers = {}
+        self._queue = []
+        self._pending = {}
+        self._inflight = {}
+        return self
+
+    def request_data(self, element: Element, url: str, data_type=SciterResourceType.RT_DATA_HTML, callback=None, priority=0):
+        """Queue `Element.request_data()`, higher priority is sent first."""
+        return self._submit(element, url, data_type, 'DATA', None, callback, priority)
+
+    def send_request(self, element: Element, url: str, params=None, method='GET', data_type=SciterResourceType.RT_DATA_HTML, callback=None, priority=0):
+        """Queue asynchronous `Element.send_request()`; POST requests are never merged."""
+        if method not in ('GET', 'POST'):
+            raise ValueError("Only GET or POST supported here.")
+        return self._submit(element, url, data_type, method, params, callback, priority)
+
+    def _submit(self, element, url, data_type, method, params, callback, priority):
+        self.stats['submitted'] += 1
+        self._seq += 1
+        if method == 'POST':
+            key = ('POST', self._seq)
+        else:
+            # only html can be applied to the other elements, see `_arrived()`
+            owner = None if data_type == SciterResourceType.RT_DATA_HTML else element.h.value
+            key = (method, url, int(data_type), tuple(sorted(params.items())) if params else None, owner)
+
+        request = self._inflight.get(key) or self._pending.get(key)
+        if request is not None:
+            # identical request is already queued or sent, just wait for its data
+            request.waiters.append((element, callback))
+            self.stats['merged'] += 1
+            if key in self._pending and priority > request.priority:
+                request.priority = priority
+                heapq.heappush(self._queue, (-priority, self._seq, request))
+            return self
+
+        request = _Request(key, element, url, data_type, method, params, callback, priority)
+        self._pending[key] = request
+        heapq.heappush(self._queue, (-priority, self._seq, request))
+        self._pump()
+        return self
+
+    def _pump(self, handler=None):
+        # `handler` reports the send errors when called from the native callback
+        queue = self._queue
+        while queue and len(self._inflight) < self.max_concurrent:
+            _, _, request = heapq.heappop(queue)
+            if self._pending.get(request.key) is not request:
+                continue    # stale heap entry of re-prioritized request
+            del self._pending[request.key]
+            try:
+                self._send(request)
+            except Exception as e:
+                if handler is None:
+                    raise
+                handler.script_exception_handler(request.method, e)
+        pass
+
+    def _send(self, request):
+        element = request.element
+        key = element.h.value
+        handler = self._handlers.get(key)
+        if handler is None:
+            handler = self._handlers[key] = _RequestHandler(self, element)
+        handler.requests.append(request)
+        self._inflight[request.key] = request
+        request.sent = time.monotonic()
+        self.stats['sent'] += 1
+        try:
+            if request.method == 'DATA':
+                element.request_data(request.url, request.data_type, element)
+            else:
+                element.send_request(request.url, request.params, request.method, True, request.data_type)
+        except Exception:
+            handler.requests.remove(request)
+            del self._inflight[request.key]
+            raise
+        pass
+
+    def _arrived(self, handler, params):
+        requests = handler.requests
+        if not requests:
+            return
+        # the engine may report the url resolved against the document
+        uri = params.uri or ''
+        request = next((r for r in requests if r.url == uri), None) \
+            or next((r for r in requests if uri.endswith(r.url)), None)
+        if request is None:
+            return      # not ours, e.g. an image of the loaded content
+        requests.remove(request)
+        self._inflight.pop(request.key, None)
+
+        elapsed = (time.monotonic() - request.sent) * 1000.0
+        stat = self.latency.get(request.url)
+        if stat is None:
+            stat = self.latency[request.url] = dict(count=0, total=0.0, max=0.0, last=0.0)
+        stat['count'] += 1
+        stat['total'] += elapsed
+        stat['max'] = max(stat['max'], elapsed)
+        stat['last'] = elapsed
+        self.stats['completed'] += 1
+
+        data = None
+        for element, callback in request.waiters:
+            try:
+                if element is not request.element and params.dataSize and params.status < 300:
+                    # merged request of another element: the engine has loaded the sent one only
+                    if data is None:
+                        # `data` field getter copies up to the first NUL, read the raw buffer instead
+                        ptr = ctypes.c_void_p.from_buffer(params, DATA_ARRIVED_PARAMS.data.offset).value
+                        data = ctypes.string_at(ptr, params.dataSize)
+                    element.set_html(data)
+                if callback is not None:
+                    callback(params)
+            except Exception as e:
+                handler.script_exception_handler('on_data_arrived', e)
+        self._pump(handler)
+        pass
+
+    pass
+
+
+class _Request:
+    """Queued or in-flight request of RequestScheduler."""
+
+    __slots__ = ('key', 'element', 'url', 'data_type', 'method', 'params', 'waiters', 'priority', 'sent')
+
+    def __init__(self, key, element, url, data_type, method, params, callback, priority):
+        self.key = key
+        self.element = element
+        self.url = url
+        self.data_type = data_type
+        self.method = method
+        self.params = params
+        self.waiters = [(element, callback)]     # (element, callback) of the merged requests
+        self.priority = priority
+        self.sent = None
+        pass
+
+    pass
+
+
+class _RequestHandler(sciter.event.EventHandler):
+    """Routes data arrived to the element back to RequestScheduler."""
+
+    def __init__(self, owner, element):
+        self.owner = owner
+        self.requests = []
+        super().__init__(element=element, subscription=EVENT_GROUPS.HANDLE_DATA_ARRIVED)
+        pass
+
+    def on_data_arrived(self, nm):
+        try:
+            self.owner._arrived(self, nm)
+        except Exception as e:
+            # nobody to raise to from the native callback
+            self.script_exception_handler('on_data_arrived', e)
+        return False    # let the engine and other handlers process the data too
+
+    pass
+
+
+class DocumentIndex:
+    """Index of element ids and names to UIDs for constant time lookups in the document of the window."""
+
+    def __init__(self, hwnd):
+        """Create index for the window document, it is built lazily on the first lookup."""
+        super().__init__()
+        self.hwnd = hwnd
+        self.stats = dict(hits=0, misses=0, builds=0)
+        self._ids = None
+        self._names = None
+        self._handler = _DocumentIndexHandler(self)
+        pass
+
+    def close(self):
+        """Stop tracking the document changes."""
+        if self._handler:
+            self._handler.detach()
+            self._handler = None
+        self.invalidate()
+        return self
+
+    def invalidate(self):
+        """Drop the index, it will be rebuilt on the next lookup."""
+        self._ids = None
+        self._names = None
+        return self
+
+    def by_id(self, name: str):
+        """Get element by its id attribute."""
+        if self._ids is None:
+            self._build()
+        uid = self._ids.get(name)
+        if uid is not None:
+            el = self._from_uid(uid)
+            if el is not None and el.attribute('id') == name:
+                self.stats['hits'] += 1
+                return el
+            # removed or changed element
+            self.invalidate()
+
+        self.stats['misses'] += 1
+        root = Element.from_window(self.hwnd)
+        el = root.find_first('[id="%s"]' % _quote(name)) if root else None
+        if el is not None and self._ids is not None:
+            self._ids[name] = el.get_uid()
+        return el
+
+    def by_name(self, name: str) -> list:
+        """Get list of elements with the name attribute."""
+        if self._names is None:
+            self._build()
+        uids = self._names.get(name)
+        if uids:
+            rv = [self._from_uid(uid) for uid in uids]
+            if all(el is not None and el.attribute('name') == name for el in rv):
+                self.stats['hits'] += 1
+                return rv
+            self.invalidate()
+
+        self.stats['misses'] += 1
+        root = Element.from_window(self.hwnd)
+        return root.find_all('[name="%s"]' % _quote(name)) if root else []
+
+    def _from_uid(self, uid):
+        p = HELEMENT()
+        ok = _api.SciterGetElementByUID(self.hwnd, uid, ctypes.byref(p))
+        return Element(p) if ok == SCDOM_RESULT.SCDOM_OK and p else None
+
+    def _build(self):
+        ids, names = {}, {}
+        cb = sciter.capi.scdef.string_receiver('wchar')
+        n = ctypes.c_uint()
+
+        def attribute(he, name):
+            ok = _api.SciterGetAttributeByNameCB(he, name, cb.reset(), None)
+            return cb.text if ok == SCDOM_RESULT.SCDOM_OK else None
+
+        def on_element(he, param):
+            ok = _api.SciterGetElementUID(he, ctypes.byref(n))
+            Element._throw_if(ok)
+            eid, ename = attribute(he, b'id'), attribute(he, b'name')
+            if eid:
+                ids.setdefault(eid, n.value)
+            if ename:
+                names.setdefault(ename, []).append(n.value)
+            return False  # continue enumeration
+
+        root = Element.from_window(self.hwnd)
+        if root:
+            scfunc = sciter.capi.scdef.SciterElementCallback(on_element)
+            ok = _api.SciterSelectElements(root, b'[id],[name]', scfunc, None)
+            Element._throw_if(ok)
+        self._ids, self._names = ids, names
+        self.stats['builds'] += 1
+        pass
+
+    pass
+
+
+class _DocumentIndexHandler(sciter.event.EventHandler):
+    """Invalidates DocumentIndex on content changes of the window document."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        super().__init__(window=owner.hwnd, subscription=EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT)
+        pass
+
+    def on_event(self, source, target, code, phase, reason):
+        if code in (BEHAVIOR_EVENTS.CONTENT_CHANGED, BEHAVIOR_EVENTS.DOCUMENT_CREATED, BEHAVIOR_EVENTS.DOCUMENT_CLOSE):
+            self.owner.invalidate()
+        return False
+
+    pass
+
+
+class StyleCache:
+    """Opt-in cache of style attributes read from the window elements.
+
+    Cached values of an element and its descendants are dropped on style, attribute, state and content changes
+    made through `Element` and on the state change events of the window; the whole cache on focus changes.
+    Styles depending on :hover are not tracked, call `invalidate()` for them.
+    """
+
+    def __init__(self, hwnd):
+        """Create cache for the window elements."""
+        super().__init__()
+        self.hwnd = hwnd
+        self.stats = dict(hits=0, misses=0, invalidations=0)
+        self._styles = {}
+        self._ancestors = {}        # element handle -> its ancestor handles
+        self._subtrees = {}         # element handle -> cached handles of it and its descendants
+        self._handler = _StyleCacheHandler(self)
+        _style_caches.add(self)
+        pass
+
+    def __len__(self):
+        """Number of the cached elements."""
+        return len(self._styles)
+
+    def close(self):
+        """Stop tracking the window events and drop the cache."""
+        _style_caches.discard(self)
+        if self._handler:
+            self._handler.detach()
+            self._handler = None
+        self._styles = {}
+        self._ancestors = {}
+        self._subtrees = {}
+        return self
+
+    def invalidate(self, element=None):
+        """Drop cached values of the element (or handle) and its descendants, all of them by default."""
+        if not self._styles:
+            return self
+        if element is None:
+            self._styles = {}
+            self._ancestors = {}
+            self._subtrees = {}
+        else:
+            he = element.h.value if isinstance(element, Element) else element
+            stale = self._subtrees.get(he)
+            if not stale:
+                return self
+            subtrees = self._subtrees
+            for key in list(stale):
+                del self._styles[key]
+                for ancestor in self._ancestors.pop(key):
+                    subtree = subtrees[ancestor]
+                    subtree.discard(key)
+                    if not subtree:
+                        del subtrees[ancestor]
+        self.stats['invalidations'] += 1
+        return self
+
+    def get(self, element: Element, names) -> dict:
+        """Get style attributes of the element, reading only the ones not cached yet."""
+        key = element.h.value
+        cached = self._styles.get(key)
+        if cached is None:
+            cached = self._styles[key] = {}
+            ancestors = self._ancestors[key] = StyleCache._ancestors_of(key)
+            for he in ancestors:
+                self._subtrees.setdefault(he, set()).add(key)
+        missing = [name for name in names if name not in cached]
+        if missing:
+            cached.update(Element._styles(element.h, missing))
+            self.stats['misses'] += len(missing)
+        self.stats['hits'] += len(names) - len(missing)
+        return {name: cached[name] for name in names}
+
+    @staticmethod
+    def _ancestors_of(he):
+        # the element itself included
+        rv = {he}
+        parent = HELEMENT()
+        while he:
+            ok = _api.SciterGetParentElement(he, ctypes.byref(parent))
+            Element._throw_if(ok)
+            he = parent.value
+            if he:
+                rv.add(he)
+        return tuple(rv)
+
+    pass
+
+
+class _StyleCacheHandler(sciter.event.EventHandler):
+    """Invalidates StyleCache entries of the elements whose state changed."""
+
+    EVENTS = frozenset((
+        BEHAVIOR_EVENTS.BUTTON_STATE_CHANGED,
+        BEHAVIOR_EVENTS.SELECT_STATE_CHANGED,
+        BEHAVIOR_EVENTS.VISIUAL_STATUS_CHANGED,
+        BEHAVIOR_EVENTS.DISABLED_STATUS_CHANGED,
+        BEHAVIOR_EVENTS.CONTENT_CHANGED,
+        BEHAVIOR_EVENTS.ELEMENT_COLLAPSED,
+        BEHAVIOR_EVENTS.ELEMENT_EXPANDED,
+        BEHAVIOR_EVENTS.UI_STATE_CHANGED,
+        BEHAVIOR_EVENTS.ANIMATION,
+    ))
+
+    DOCUMENT_EVENTS = frozenset((
+        BEHAVIOR_EVENTS.DOCUMENT_CREATED,
+        BEHAVIOR_EVENTS.DOCUMENT_CLOSE,
+    ))
+
+    def __init__(self, owner):
+        self.owner = owner
+        subscription = EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT | EVENT_GROUPS.HANDLE_FOCUS
+        super().__init__(window=owner.hwnd, subscription=subscription)
+        pass
+
+    def on_event(self, source, target, code, phase, reason):
+        if phase & PHASE_MASK.SINKING:
+            return False    # the bubbling one follows
+        if code in self.EVENTS:
+            self.owner.invalidate((target or source).value)
+        elif code in self.DOCUMENT_EVENTS:
+            self.owner.invalidate()
+        return False
+
+    def on_focus(self, params):
+        # the focused element is not in the params, focus changes are rare anyway
+        if not params.cmd & PHASE_MASK.SINKING:
+            self.owner.invalidate()
+        return False
+
+    pass
+
+
+def _invalidate_styles(he):
+    for cache in _style_caches:
+        cache.invalidate(he)
+    pass
+
+
+def _style_name(name: str) -> bytes:
+    # style attribute names are few, keep them encoded
+    rv = _style_names.get(name)
+    if rv is None:
+        rv = _style_names[name] = name.encode('utf-8')
+    return rv
+
+
+def _quote(text: str) -> str:
+    # escape value for the quoted attribute selector
+    return text.replace('\\', '\\\\').replace('"', '\\"')
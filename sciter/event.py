@@ -1,13 +1,35 @@
 """Behaviors support (a.k.a windowless controls)."""
 
+import time
 import ctypes
+import inspect
+import functools
+import threading
+import collections
 import sciter.capi.scdef
+import sciter.executor
 
+from concurrent.futures import CancelledError
 from sciter.capi.scbehavior import *
 from sciter.capi.scdom import SCDOM_RESULT, HELEMENT
 
 _api = sciter.SciterAPI()
 
+# behavior events treated as content mutations by MutationObserver
+MUTATION_EVENTS = frozenset((
+    BEHAVIOR_EVENTS.BUTTON_STATE_CHANGED,
+    BEHAVIOR_EVENTS.EDIT_VALUE_CHANGED,
+    BEHAVIOR_EVENTS.SELECT_SELECTION_CHANGED,
+    BEHAVIOR_EVENTS.SELECT_STATE_CHANGED,
+    BEHAVIOR_EVENTS.CONTENT_CHANGED,
+    BEHAVIOR_EVENTS.CHANGE,
+    BEHAVIOR_EVENTS.ELEMENT_COLLAPSED,
+    BEHAVIOR_EVENTS.ELEMENT_EXPANDED,
+))
+
+# changes of one element during one batch: events seen, OR-ed reasons and number of raw events
+MutationRecord = collections.namedtuple('MutationRecord', 'target events reason count')
+
 
 class EventHandler:
     """DOM event handler which can be attached to any DOM element."""
@@ -18,12 +40,17 @@ class EventHandler:
     def __init__(self, window=None, element=None, subscription=None):
         """Attach event handler to dom::element or sciter::window."""
         super().__init__()
-        self.subscription = subscription if subscription is not None else EventHandler.DEFAULT_EVENTS
+        self.subscription = subscription if subscription is not None else self._default_subscription()
         self.element = None
         self._attached_to_window = None
         self._attached_to_element = None
         self._dispatcher = dict()
-        self._executor = None
+        self._executor = None               # own executor instead of the shared ones, shut down on detach
+        self._observer = None
+        self._completions = None            # CompletionQueue of the threading and promise handlers
+        self._inflight = {}                 # name -> _PromiseCall of the `supersede` handlers
+        self._deferred = {}                 # function -> _Deferred state of @throttle/@debounce/@coalesce methods
+        self._deferred_timers = {}          # timer id -> _Deferred
         self.set_dispatch_options()
         if window or element:
             self.attach(window, element, subscription)
@@ -35,7 +62,11 @@ class EventHandler:
     def attach(self, window=None, element=None, subscription=None):
         """Attach event handler to dom::element or sciter::window."""
         assert(window or element)
-        self.subscription = subscription if subscription is not None else EventHandler.DEFAULT_EVENTS
+        self.subscription = subscription if subscription is not None else self._default_subscription()
+        self._routes = self._routing_table()
+        if self._has_deferred():
+            # deferred methods run from the element timer
+            self.subscription |= EVENT_GROUPS.HANDLE_TIMER
         self._event_handler_proc = sciter.capi.scdef.ElementEventProc(self._element_proc)
         tag = id(self)
         if window:
@@ -53,6 +84,14 @@ class EventHandler:
     def detach(self):
         """Detach event handler from dom::element or sciter::window."""
         tag = id(self)
+        if self._observer is not None:
+            self._observer.disconnect()
+            self._observer = None
+        if self._completions is not None:
+            self._completions.close()
+            self._completions = None
+        for state in self._deferred.values():
+            state.cancel()
         if self._executor is not None:
             self._executor.shutdown()
             self._executor = None
@@ -81,10 +120,52 @@ class EventHandler:
         self._dispatcher['runtime'] = dynamic_handlers      # class handlers may be added at runtime, so we won't cache it
         self._dispatcher['static'] = raw_handlers           # `self.on_script_call` is always called
         self._dispatcher['require'] = require_attribute     # class handlers require @sciter.script attribute
-        self._dispatcher['handlers'] = {}
-        self._dispatcher_update(True)
+        self._dispatcher.setdefault('registered', {})       # handlers added by `register_handler()`
+        self._dispatcher['handlers'] = dict(self._dispatcher['registered'])
+        return self
+
+    def register_handler(self, name: str, fn):
+        """Route script calls of `name` to `fn` for this instance only, `None` removes the handler."""
+        registered, handlers = self._dispatcher['registered'], self._dispatcher['handlers']
+        if fn is None:
+            registered.pop(name, None)
+            handlers.pop(name, None)
+        else:
+            registered[name] = handlers[name] = fn
         return self
 
+    def deferred_stats(self) -> dict:
+        """Get calls, runs and dropped events counters of the @throttle/@debounce/@coalesce methods."""
+        return {fn.__qualname__: dict(calls=state.calls, runs=state.runs, dropped=state.dropped) for fn, state in self._deferred.items()}
+
+    def observe_mutations(self, events=None, interval=16):
+        """Deliver content changes of the attached element (or window root) to `on_mutations()` in batches."""
+        if self._observer is None:
+            if self._attached_to_element:
+                target = self._attached_to_element
+            elif self._attached_to_window:
+                target = sciter.Element.from_window(self._attached_to_window)
+            else:
+                raise sciter.SciterError("Event handler is not attached")
+            self._observer = MutationObserver(self.on_mutations, events=events, interval=interval)
+            self._observer.observe(target)
+        return self._observer
+
+    def completion_queue(self):
+        """Queue which calls back on the UI thread, used to settle the threading and promise handlers; None if not attached."""
+        if self._completions is None or self._completions._target is None:
+            if self._attached_to_element:
+                target = self._attached_to_element
+            elif self._attached_to_window:
+                try:
+                    target = sciter.Element.from_window(self._attached_to_window)
+                except sciter.SciterError:
+                    return None
+            else:
+                return None
+            self._completions = CompletionQueue(target)
+        return self._completions
+
     ## @name following functions can be overloaded
     ## @param he - a `this` element for behavior attached to
     ## @param source - source element of this event
@@ -139,6 +220,14 @@ class EventHandler:
         """Element focus get/loose event."""
         pass
 
+    def on_scroll(self, params: SCROLL_PARAMS):
+        """Element scroll event."""
+        pass
+
+    def on_mutations(self, records: list):
+        """Batch of `MutationRecord`s, one per changed element; see `observe_mutations()`."""
+        pass
+
     def on_draw(self, params: DRAW_PARAMS):
         """Element draw event. Return `True` for custom drawing, `False` for default drawing."""
         pass
@@ -153,30 +242,53 @@ class EventHandler:
         """Document created, script namespace initialized. target -> the document."""
         pass
 
-    def _dispatcher_update(self, force=False):
-        if not self._dispatcher['enabled']:
-            return
-        if not force and not self._dispatcher['runtime']:
-            return
-        required = self._dispatcher['require']
-        handlers = {}
-        for name in dir(self):
-            member = getattr(self, name, None)
-
-            # check optional attribute for name mapping
-            attr = getattr(member, '_from_sciter', False)
-            fnname = attr if isinstance(attr, str) else name
-            if attr or not required:
-                handlers[fnname] = member
-        self._dispatcher['handlers'] = handlers
-        pass
+    @classmethod
+    def _dispatch_table(cls, required):
+        # script name -> attribute name, computed once per class (subclasses get their own table)
+        tables = cls.__dict__.get('_sciter_dispatch_tables')
+        if tables is None:
+            tables = {}
+            setattr(cls, '_sciter_dispatch_tables', tables)
+        table = tables.get(required)
+        if table is None:
+            table = {}
+            for name in dir(cls):
+                member = getattr(cls, name, None)
+                if not callable(member):
+                    continue
+
+                # check optional attribute for name mapping
+                attr = getattr(member, '_from_sciter', False)
+                fnname = attr if isinstance(attr, str) else name
+                if attr or not required:
+                    table[fnname] = name
+            tables[required] = table
+        return table
+
+    def _dispatcher_resolve(self, fname):
+        # slow path of the script call dispatching: find handler by the class table or, if dynamic, by the instance
+        dispatcher = self._dispatcher
+        if not dispatcher['enabled']:
+            return None
+        name = self._dispatch_table(dispatcher['require']).get(fname)
+        if name is not None:
+            fn = getattr(self, name, None)
+            if not dispatcher['runtime']:
+                dispatcher['handlers'][fname] = fn
+            return fn
+        if dispatcher['runtime']:
+            # handlers may be added at runtime, so look at the instance
+            fn = getattr(self, fname, None)
+            attr = getattr(fn, '_from_sciter', False)
+            if callable(fn) and (attr is True or attr == fname or not dispatcher['require']):
+                return fn
+        return None
 
     def _on_script_call(self, f):
-        # update handlers on every call if needed
-        self._dispatcher_update()
-
         fname = f.name.decode('utf-8')
         fn = self._dispatcher['handlers'].get(fname)
+        if fn is None:
+            fn = self._dispatcher_resolve(fname)
         call_raw = self._dispatcher['static']
         rv = None
         value_args = None
@@ -221,25 +333,39 @@ class EventHandler:
                             self.script_exception_handler(fname, exc)
                         pass
 
-                    if self._executor is None:
-                        from concurrent.futures import ThreadPoolExecutor
-                        self._executor = ThreadPoolExecutor()
-
-                    # submit to the executor and wait for completion
-                    fut = self._executor.submit(fn, *args)
-                    fut.add_done_callback(on_thread_done)
+                    loop = _aio_loop(fn)
+                    if loop is not None:
+                        # coroutine handler runs on the UI thread in the sciter.aio loop
+                        fut = loop.create_task(fn(*args))
+                        fut.add_done_callback(on_thread_done)
+                        return True
+
+                    # submit to the shared executor and wait for completion
+                    executor = self._executor or sciter.executor.get_executor(cfg.get('executor') or 'default')
+                    try:
+                        fut = _submit(executor, fn, cfg, args)
+                    except sciter.executor.ExecutorBusy as e:
+                        # nowhere to report it but the exception hook
+                        self.script_exception_handler(fname, e)
+                        return True
+                    fut.add_done_callback(_on_ui_thread(self.completion_queue(), on_thread_done))
                     return True
 
-                elif cfg.get('promise'):
-                    # submit this promise handler to a separate thread
+                elif cfg.get('promise') or cfg.get('process'):
+                    # submit this promise handler to a separate thread (or a worker process)
                     # syntax:
-                    # `root.xcall(name, [args], resolve, reject)`
+                    # `var cancel = root.xcall(name, [args], resolve, reject)`
+                    # `cancel()` rejects the promise with "cancelled" and cancels the call
                     jsargs = args[0]
                     jsresolve = args[1]
                     jsreject = args[2]
+                    call = _PromiseCall(jsreject)
+                    rv = call.cancel
 
                     def on_task_done(fut):
-                        if fut.cancelled():
+                        if self._inflight.get(fname) is call:
+                            del self._inflight[fname]
+                        if fut.cancelled() or not call.settle():
                             return
 
                         exc = fut.exception()
@@ -257,13 +383,51 @@ class EventHandler:
                                 jsreject(str(exc))
                         pass
 
-                    if self._executor is None:
-                        from concurrent.futures import ThreadPoolExecutor
-                        self._executor = ThreadPoolExecutor()
+                    if cfg.get('supersede'):
+                        # the previous call of this handler is not needed anymore
+                        previous = self._inflight.get(fname)
+                        if previous is not None:
+                            previous.cancel()
+                        self._inflight[fname] = call
+
+                    loop = _aio_loop(fn)
+                    if loop is not None:
+                        # coroutine handler runs on the UI thread in the sciter.aio loop,
+                        # cancelling raises CancelledError inside it
+                        call.future = loop.create_task(fn(*jsargs))
+                        call.future.add_done_callback(on_task_done)
+
+                    elif cfg.get('process') and getattr(fn, '__self__', None) is not None:
+                        # `self` can't be sent to another process
+                        call.settle()
+                        jsreject("`process` handler '%s' must be a @staticmethod or a function" % fname)
+
+                    else:
+                        if cfg.get('process'):
+                            executor = sciter.executor.get_executor(cfg.get('executor') or 'process')
+                            task = fn
+                        else:
+                            executor = self._executor or sciter.executor.get_executor(cfg.get('executor') or 'default')
+                            # generator handler checks for cancellation on every `yield`
+                            task = functools.partial(_drive, fn, call) if inspect.isgeneratorfunction(fn) else fn
+
+                        # submit to the shared executor and wait for completion
+                        try:
+                            call.future = _submit(executor, task, cfg, jsargs, getattr(fn, '__func__', fn))
+                        except sciter.executor.ExecutorBusy as e:
+                            # backpressure: settle the promise right away
+                            call.settle()
+                            if getattr(executor, 'on_busy', 'reject') == 'resolve':
+                                jsresolve(executor.busy_value)
+                            else:
+                                jsreject(str(e))
+                        else:
+                            # the result is packed and the promise is settled on the UI thread
+                            call.future.add_done_callback(_on_ui_thread(self.completion_queue(), on_task_done))
 
-                    # submit to the executor and wait for completion
-                    fut = self._executor.submit(fn, *jsargs)
-                    fut.add_done_callback(on_task_done)
+                    if call.settled and self._inflight.get(fname) is call:
+                        del self._inflight[fname]
+                    sciter.Value.pack_to(f.result, rv)
                     return True
 
                 rv = fn(*args)
@@ -287,104 +451,547 @@ class EventHandler:
             return True
         return False
 
+    @classmethod
+    def _overridden(cls, name):
+        return getattr(cls, name) is not getattr(EventHandler, name)
+
+    @classmethod
+    def _default_subscription(cls):
+        # DEFAULT_EVENTS plus the groups of the overridden `on_*` handlers
+        subscription = cls.__dict__.get('_sciter_subscription')
+        if subscription is None:
+            subscription = cls.DEFAULT_EVENTS
+            for evt, (name, _) in _ROUTES.items():
+                if cls._overridden(name):
+                    subscription |= evt
+            if cls._has_deferred():
+                subscription |= EVENT_GROUPS.HANDLE_TIMER
+            setattr(cls, '_sciter_subscription', subscription)
+        return subscription
+
+    @classmethod
+    def _routing_table(cls):
+        # event group -> route(self, he, params), computed once per class
+        table = cls.__dict__.get('_sciter_routes')
+        if table is None:
+            table = {
+                EVENT_GROUPS.SUBSCRIPTIONS_REQUEST: EventHandler._route_subscription,
+                EVENT_GROUPS.HANDLE_INITIALIZATION: EventHandler._route_initialization,
+                EVENT_GROUPS.HANDLE_SCRIPTING_METHOD_CALL: EventHandler._route_script_call,
+                EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT: (EventHandler._route_behavior_event if cls._overridden('on_event')
+                                                     else EventHandler._route_document_event),
+            }
+            # skip the groups whose handlers aren't overridden
+            for evt, (name, params_type) in _ROUTES.items():
+                if cls._overridden(name):
+                    table[evt] = _make_route(getattr(cls, name), params_type)
+            if cls._has_deferred():
+                # timers of the deferred methods come first, then on_timer()
+                table[EVENT_GROUPS.HANDLE_TIMER] = _make_deferred_route(table.get(EVENT_GROUPS.HANDLE_TIMER))
+            setattr(cls, '_sciter_routes', table)
+        return table
+
+    @classmethod
+    def _has_deferred(cls):
+        # has @throttle/@debounce/@coalesce methods
+        rv = cls.__dict__.get('_sciter_has_deferred')
+        if rv is None:
+            rv = any(getattr(getattr(cls, name, None), '_sciter_deferred', None) for name in dir(cls))
+            setattr(cls, '_sciter_has_deferred', rv)
+        return rv
+
+    def _route_subscription(self, he, params):
+        p = ctypes.cast(params, ctypes.POINTER(ctypes.c_uint))
+        request = p.contents.value
+        subscribed = self.on_subscription(request)
+        if subscribed is not None:
+            p[0] = int(subscribed)
+            return True
+        return False
+
+    def _route_initialization(self, he, params):
+        # handle initialization events and route to attached() and detached()
+        # NOTE: when attaching to empty window, this called with he == NULL
+        cmd = INITIALIZATION_PARAMS.from_address(params).cmd
+        he = HELEMENT(he)
+        if cmd == INITIALIZATION_EVENTS.BEHAVIOR_DETACH:
+            self.detached(he)
+            self.element = None
+        elif cmd == INITIALIZATION_EVENTS.BEHAVIOR_ATTACH:
+            self.element = sciter.Element(he)
+            self.attached(he)
+        return True
+
+    def _route_script_call(self, he, params):
+        return self._on_script_call(SCRIPTING_METHOD_PARAMS.from_address(params))
+
+    def _route_document_event(self, he, params):
+        # route to document_complete(), document_close() and _document_ready() only, on_event() is not overridden
+        m = BEHAVIOR_EVENT_PARAMS.from_address(params)
+        cmd = m.cmd
+        if cmd == BEHAVIOR_EVENTS.DOCUMENT_COMPLETE:
+            self.element = sciter.Element(HELEMENT(he))
+            self.document_complete()
+        elif cmd == BEHAVIOR_EVENTS.DOCUMENT_CLOSE:
+            self.document_close()
+            self.element = None
+        elif cmd == BEHAVIOR_EVENTS.DOCUMENT_READY:
+            self._document_ready(HELEMENT(m.heTarget))
+        return False
+
+    def _route_behavior_event(self, he, params):
+        # handle behavior events and route to on_event(), document_complete() and document_close()
+        self._route_document_event(he, params)
+        m = BEHAVIOR_EVENT_PARAMS.from_address(params)
+        code = (m.cmd & 0xFFF)
+        phase = m.cmd & 0xFFFFF000
+        reason = m.reason                       # reason can be CLICK_REASON or EDIT_CHANGED_REASON, so leave it as int
+        event = _BEHAVIOR_CODES.get(code, code)  # not all codes enumerated in BEHAVIOR_EVENTS :-\
+        handled = self.on_event(HELEMENT(m.he), HELEMENT(m.heTarget), event, _PHASES.get(phase, phase), reason)
+        return handled or False
+
     # event handler native callback
     def _element_proc(self, tag, he, evt, params):
         # pylint: disable=assignment-from-none,assignment-from-no-return
         # because the `self.on_` methods can be overloaded
+        route = self._routes.get(evt)
+        if route is None:
+            return False
+        return route(self, he, params)
 
-        he = HELEMENT(he)
-        if evt == EVENT_GROUPS.SUBSCRIPTIONS_REQUEST:
-            p = ctypes.cast(params, ctypes.POINTER(ctypes.c_uint))
-            request = p.contents.value
-            subscribed = self.on_subscription(request)
-            if subscribed is not None:
-                p[0] = int(subscribed)
-                return True
+    def script_exception_handler(self, func_name, exception):
+        """
+        By default, just prints exception traceback to stderr and then returns it.
+        Can be overridden to change script exception handling.
+        """
+        import traceback
+        traceback.print_tb(exception.__traceback__)
+        return exception
 
-        elif evt == EVENT_GROUPS.HANDLE_INITIALIZATION:
-            # handle initialization events and route to attached() and detached()
-            # NOTE: when attaching to empty window, this called with he == NULL
-            p = ctypes.cast(params, ctypes.POINTER(INITIALIZATION_PARAMS))
-            if p.contents.cmd == INITIALIZATION_EVENTS.BEHAVIOR_DETACH:
-                self.detached(he)
-                self.element = None
-            elif p.contents.cmd == INITIALIZATION_EVENTS.BEHAVIOR_ATTACH:
-                self.element = sciter.Element(he)
-                self.attached(he)
-            return True
+    pass
+
+
+# event group -> (handler name, params structure); the routes are built only for the overridden handlers
+_ROUTES = {
+    EVENT_GROUPS.HANDLE_DATA_ARRIVED: ('on_data_arrived', DATA_ARRIVED_PARAMS),
+    EVENT_GROUPS.HANDLE_DRAW: ('on_draw', DRAW_PARAMS),
+    EVENT_GROUPS.HANDLE_MOUSE: ('on_mouse', MOUSE_PARAMS),
+    EVENT_GROUPS.HANDLE_KEY: ('on_key', KEY_PARAMS),
+    EVENT_GROUPS.HANDLE_FOCUS: ('on_focus', FOCUS_PARAMS),
+    EVENT_GROUPS.HANDLE_SCROLL: ('on_scroll', SCROLL_PARAMS),
+    EVENT_GROUPS.HANDLE_TIMER: ('on_timer', TIMER_PARAMS),
+    EVENT_GROUPS.HANDLE_SIZE: ('on_size', None),
+}
+
+_BEHAVIOR_CODES = {int(code): code for code in BEHAVIOR_EVENTS}
+_PHASES = {int(phase): phase for phase in PHASE_MASK}
+
+
+def _aio_loop(fn):
+    # the sciter.aio loop for coroutine handlers, if it is installed
+    if not inspect.iscoroutinefunction(fn):
+        return None
+    import sciter.aio
+    return sciter.aio.get_loop()
+
+
+def _on_ui_thread(queue, fn):
+    # future done callback which calls `fn(fut)` on the UI thread, or right away without the queue
+    if queue is None:
+        return fn
+    return functools.partial(queue.push, fn)
+
+
+def _submit(executor, fn, cfg, args, handler=None):
+    # per-handler concurrency limits are supported by the sciter executors only
+    if isinstance(executor, sciter.executor.BoundedExecutor):
+        key = handler if handler is not None else getattr(fn, '__func__', fn)
+        return executor.submit(fn, *args, key=key, limit=cfg.get('concurrency'))
+    return executor.submit(fn, *args)
+
+
+def _drive(fn, call, *args):
+    # run generator handler, raise CancelledError at its `yield` once the call is cancelled;
+    # its return value resolves the promise, a cancelled call is rejected already and returns nothing
+    gen = fn(*args)
+    try:
+        while True:
+            if call.cancelled:
+                gen.throw(CancelledError)
+                gen.close()
+                raise CancelledError()
+            next(gen)
+    except StopIteration as e:
+        return e.value
+    pass
+
+
+class _PromiseCall:
+    """In-flight call of a promise handler, `cancel` is returned to script."""
+
+    __slots__ = ('reject', 'future', 'settled', 'cancelled')
+
+    def __init__(self, reject):
+        self.reject = reject
+        self.future = None
+        self.settled = False
+        self.cancelled = False
+        pass
+
+    def settle(self) -> bool:
+        """Mark the promise settled, False if it was already."""
+        if self.settled:
+            return False
+        self.settled = True
+        return True
+
+    def cancel(self, *args) -> bool:
+        """Cancel the call and reject its promise with "cancelled"; False if it is already settled."""
+        if not self.settle():
+            return False
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+        self.reject("cancelled")
+        return True
+
+    pass
+
+
+def _make_deferred_route(timer_route):
+    def route(self, he, params):
+        timer_id = TIMER_PARAMS.from_address(params).timerId
+        state = self._deferred_timers.get(timer_id)
+        if state is not None:
+            return state.fire(self)
+        return timer_route(self, he, params) if timer_route else False
+    return route
+
+
+def _make_route(fn, params_type):
+    if params_type is None:
+        def route(self, he, params):
+            return fn(self) or False
+    elif params_type is TIMER_PARAMS:
+        def route(self, he, params):
+            return fn(self, TIMER_PARAMS.from_address(params).timerId) or False
+    else:
+        def route(self, he, params):
+            return fn(self, params_type.from_address(params)) or False
+    return route
+
+
+def throttle(ms):
+    """Decorator for EventHandler methods: run at most once per `ms`, deferred calls get the latest arguments."""
+    return _deferred_method('throttle', ms)
+
+
+def debounce(ms):
+    """Decorator for EventHandler methods: run with the latest arguments once no calls came for `ms`."""
+    return _deferred_method('debounce', ms)
+
+
+def coalesce(per_frame=True):
+    """Decorator for EventHandler methods: run once per frame (or on the next timer tick) with the latest arguments."""
+    return _deferred_method('coalesce', 16 if per_frame else 1)
+
+
+def _deferred_method(mode, ms):
+    def decorator(fn):
+        if fn.__name__ == 'on_draw':
+            # DRAW_PARAMS.gfx is valid during the draw event only
+            raise sciter.SciterError("on_draw can't be deferred")
+
+        @functools.wraps(fn)
+        def wrapper(self, *args):
+            # keyed by the function: an override and its super() method have separate states
+            state = self._deferred.get(fn)
+            if state is None:
+                state = self._deferred[fn] = _Deferred(self, fn, mode, ms)
+            return state.call(self, args)
+        wrapper._sciter_deferred = (mode, ms)
+        return wrapper
+    return decorator
+
+
+class _Deferred:
+    """State of a @throttle/@debounce/@coalesce method of an EventHandler instance."""
+
+    def __init__(self, handler, fn, mode, ms):
+        self.fn = fn
+        self.mode = mode
+        self.ms = max(1, int(ms))
+        self.args = None
+        self.last = None            # time of the last run
+        self.scheduled = None       # element with the running timer
+        self.timer_id = id(self)
+        self.calls = 0
+        self.runs = 0
+        self.dropped = 0
+        handler._deferred_timers[self.timer_id] = self
+        pass
+
+    def call(self, handler, args):
+        self.calls += 1
+        now = time.monotonic()
+        if self.mode == 'throttle' and self.scheduled is None:
+            if self.last is None or (now - self.last) * 1000.0 >= self.ms:
+                return self._run(handler, args, now)
+
+        element = handler.element or handler._attached_to_element
+        if not element:
+            # nowhere to start the timer
+            return self._run(handler, args, now)
+
+        # ctypes structures are valid during the native call only, keep a copy
+        if self.args is not None:
+            self.dropped += 1
+        self.args = tuple(type(arg).from_buffer_copy(arg) if isinstance(arg, ctypes.Structure) else arg for arg in args)
+
+        if self.mode == 'throttle':
+            if self.scheduled is None:
+                delay = self.ms - (now - self.last) * 1000.0
+                self._start(element, max(1, int(delay)))
+        elif self.mode == 'debounce':
+            self._start(element, self.ms)   # restart
+        elif self.scheduled is None:
+            self._start(element, self.ms)
+        return False
+
+    def fire(self, handler):
+        self.scheduled = None
+        args, self.args = self.args, None
+        if args is not None:
+            self._run(handler, args, time.monotonic())
+        return False    # stop the timer
+
+    def cancel(self):
+        if self.scheduled is not None:
+            self.scheduled.stop_timer(self.timer_id)
+            self.scheduled = None
+        self.args = None
+        pass
 
-        elif evt == EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT:
-            # handle behavior events and route to on_event(), document_complete() and document_close()
-            p = ctypes.cast(params, ctypes.POINTER(BEHAVIOR_EVENT_PARAMS))
-            m = p.contents
-            if m.cmd == BEHAVIOR_EVENTS.DOCUMENT_COMPLETE:
-                self.element = sciter.Element(he)
-                self.document_complete()
-            elif m.cmd == BEHAVIOR_EVENTS.DOCUMENT_CLOSE:
-                self.document_close()
-                self.element = None
-            elif m.cmd == BEHAVIOR_EVENTS.DOCUMENT_READY:
-                self._document_ready(HELEMENT(m.heTarget))
-
-            code = (m.cmd & 0xFFF)
-            phase = PHASE_MASK(m.cmd & 0xFFFFF000)
-            reason = m.reason                   # reason can be CLICK_REASON or EDIT_CHANGED_REASON, so leave it as int
+    def _start(self, element, ms):
+        element.start_timer(ms, self.timer_id)
+        self.scheduled = element
+        pass
+
+    def _run(self, handler, args, now):
+        self.last = now
+        self.runs += 1
+        return self.fn(handler, *args)
+
+    pass
+
+
+class MutationObserver(EventHandler):
+    """Collects content change events of the element subtree and delivers them in batches, one record per element."""
+
+    def __init__(self, callback, element=None, events=None, interval=16):
+        """Call `callback(records)` at most once per `interval` ms (16 is one frame, 1 is the next idle tick)."""
+        self.callback = callback
+        self.events = frozenset(int(code) for code in (events if events is not None else MUTATION_EVENTS))
+        self.interval = max(1, int(interval))
+        self.stats = dict(events=0, records=0, batches=0)
+        self._records = {}
+        self._timer_id = id(self)
+        self._scheduled = False
+        super().__init__(subscription=EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT | EVENT_GROUPS.HANDLE_TIMER)
+        if element:
+            self.observe(element)
+        pass
+
+    def __len__(self):
+        """Number of the pending records."""
+        return len(self._records)
+
+    def observe(self, element):
+        """Start observing the element and its descendants."""
+        self.attach(element=element, subscription=self.subscription)
+        return self
+
+    def disconnect(self):
+        """Stop observing, the pending records are dropped."""
+        if self._attached_to_element:
+            self._attached_to_element.stop_timer(self._timer_id)
+            self.detach()
+        self._records = {}
+        self._scheduled = False
+        return self
+
+    def take_records(self) -> list:
+        """Return the pending records and clear the queue."""
+        records = self._records
+        self._records = {}
+        return [MutationRecord(target, frozenset(self._event_code(code) for code in codes), reason, count)
+                for target, codes, reason, count in records.values()]
+
+    def flush(self):
+        """Deliver the pending records right now."""
+        records = self.take_records()
+        if records:
+            self.stats['batches'] += 1
+            self.stats['records'] += len(records)
             try:
-                event = BEHAVIOR_EVENTS(code)   # not all codes enumerated in BEHAVIOR_EVENTS :-\
-            except ValueError:
-                event = code
-            handled = self.on_event(HELEMENT(m.he), HELEMENT(m.heTarget), event, phase, reason)
-            return handled or False
-
-        elif evt == EVENT_GROUPS.HANDLE_SCRIPTING_METHOD_CALL:
-            # handle script calls
-            p = ctypes.cast(params, ctypes.POINTER(SCRIPTING_METHOD_PARAMS))
-            return self._on_script_call(p.contents)
-
-        elif evt == EVENT_GROUPS.HANDLE_DATA_ARRIVED:
-            # notification event: data requested by HTMLayoutRequestData just delivered
-            p = ctypes.cast(params, ctypes.POINTER(DATA_ARRIVED_PARAMS))
-            handled = self.on_data_arrived(p.contents)
-            return handled or False
-
-        elif evt == EVENT_GROUPS.HANDLE_DRAW:
-            p = ctypes.cast(params, ctypes.POINTER(DRAW_PARAMS))
-            handled = self.on_draw(p.contents)
-            return handled or False
-
-        elif evt == EVENT_GROUPS.HANDLE_MOUSE:
-            p = ctypes.cast(params, ctypes.POINTER(MOUSE_PARAMS))
-            handled = self.on_mouse(p.contents)
-            return handled or False
-
-        elif evt == EVENT_GROUPS.HANDLE_KEY:
-            p = ctypes.cast(params, ctypes.POINTER(KEY_PARAMS))
-            handled = self.on_key(p.contents)
-            return handled or False
-
-        elif evt == EVENT_GROUPS.HANDLE_FOCUS:
-            p = ctypes.cast(params, ctypes.POINTER(FOCUS_PARAMS))
-            handled = self.on_focus(p.contents)
-            return handled or False
+                self.callback(records)
+            except Exception as e:
+                self.script_exception_handler('on_mutations', e)
+        return self
+
+    @staticmethod
+    def _event_code(code):
+        try:
+            return BEHAVIOR_EVENTS(code)
+        except ValueError:
+            return code    # not all codes enumerated in BEHAVIOR_EVENTS
+
+    def _record(self, he, code, reason):
+        # called from the native callback: no wrappers except the first sight of the element in the batch
+        rec = self._records.get(he)
+        if rec is None:
+            rec = self._records[he] = [sciter.Element(HELEMENT(he)), set(), 0, 0]
+        rec[1].add(code)
+        rec[2] |= reason
+        rec[3] += 1
+        self.stats['events'] += 1
+        if not self._scheduled:
+            self._scheduled = True
+            self._attached_to_element.start_timer(self.interval, self._timer_id)
+        pass
+
+    def _element_proc(self, tag, he, evt, params):
+        if evt == EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT:
+            m = ctypes.cast(params, ctypes.POINTER(BEHAVIOR_EVENT_PARAMS)).contents
+            cmd = m.cmd
+            if not (cmd & PHASE_MASK.SINKING) and (cmd & 0xFFF) in self.events:
+                # target is NULL when the window got a new document
+                self._record(m.heTarget or he, cmd & 0xFFF, m.reason)
+            return False
 
         elif evt == EVENT_GROUPS.HANDLE_TIMER:
             p = ctypes.cast(params, ctypes.POINTER(TIMER_PARAMS))
-            handled = self.on_timer(p.contents.timerId)
-            return handled or False
+            if p.contents.timerId != self._timer_id:
+                return False
+            self._scheduled = False
+            self.flush()
+            return False    # stop the timer
 
-        elif evt == EVENT_GROUPS.HANDLE_SIZE:
-            handled = self.on_size()
-            return handled or False
+        return super()._element_proc(tag, he, evt, params)
 
-        return False
+    pass
 
-    def script_exception_handler(self, func_name, exception):
-        """
-        By default, just prints exception traceback to stderr and then returns it.
-        Can be overridden to change script exception handling.
-        """
-        import traceback
-        traceback.print_tb(exception.__traceback__)
-        return exception
+
+class CompletionQueue(EventHandler):
+    """Thread-safe queue of callbacks which are called on the UI thread in batches.
+
+    Worker threads `push()` callbacks, the queue wakes the UI thread by posting an event
+    to its element and calls the queued callbacks from that event handler.
+    """
+
+    COMPLETION_EVENT = BEHAVIOR_EVENTS.FIRST_APPLICATION_EVENT_CODE + 0xC0
+
+    def __init__(self, element, batch=256):
+        """Attach queue to the element, at most `batch` callbacks are called per wake-up."""
+        self.batch = batch
+        self.stats = dict(pushed=0, called=0, dropped=0, batches=0, wakeups=0, max_batch=0,
+                          latency_total=0.0, latency_max=0.0)
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._woken = False
+        self._target = element
+        super().__init__(element=element, subscription=EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT)
+        pass
+
+    def __len__(self):
+        """Number of the pending callbacks."""
+        return len(self._queue)
+
+    def push(self, fn, *args):
+        """Call `fn(*args)` on the UI thread, can be called from any thread."""
+        with self._lock:
+            if self._target is None:
+                self.stats['dropped'] += 1
+                return False
+            self._queue.append((fn, args, time.monotonic()))
+            self.stats['pushed'] += 1
+            if self._woken:
+                return True
+            self._woken = True
+        self._wake()
+        return True
+
+    def drain(self, limit=None) -> int:
+        """Call up to `limit` (default `batch`) pending callbacks on the current (UI) thread."""
+        queue = self._queue
+        items = []
+        with self._lock:
+            for _ in range(min(len(queue), limit or self.batch)):
+                items.append(queue.popleft())
+            more = bool(queue)
+            if not more:
+                self._woken = False
+        if more:
+            self._wake()
+        if not items:
+            return 0
+
+        stats = self.stats
+        now = time.monotonic()
+        for fn, args, queued in items:
+            latency = now - queued
+            stats['latency_total'] += latency
+            if latency > stats['latency_max']:
+                stats['latency_max'] = latency
+            try:
+                fn(*args)
+            except Exception as e:
+                self.script_exception_handler(getattr(fn, '__name__', repr(fn)), e)
+        stats['called'] += len(items)
+        stats['batches'] += 1
+        stats['max_batch'] = max(stats['max_batch'], len(items))
+        return len(items)
+
+    def mean_latency(self):
+        """Average time in seconds between `push()` and the call on the UI thread."""
+        called = self.stats['called']
+        return self.stats['latency_total'] / called if called else 0.0
+
+    def close(self):
+        """Call the pending callbacks and detach from the element, the later ones are dropped."""
+        if self._target is not None:
+            while self.drain():
+                pass
+            with self._lock:
+                self._target = None
+            self.detach()
+        return self
+
+    def detached(self, he):
+        # the element is gone, nothing can be resolved after that
+        with self._lock:
+            self._target = None
+            self.stats['dropped'] += len(self._queue)
+            self._queue.clear()
+        pass
+
+    def _wake(self):
+        # SciterPostEvent is thread-safe: the event is delivered later on the UI thread
+        self.stats['wakeups'] += 1
+        target = self._target
+        ok = _api.SciterPostEvent(target, self.COMPLETION_EVENT, target, 0) if target is not None else None
+        if ok != SCDOM_RESULT.SCDOM_OK:
+            with self._lock:
+                self._woken = False
+        pass
+
+    def _element_proc(self, tag, he, evt, params):
+        if evt == EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT:
+            cmd = BEHAVIOR_EVENT_PARAMS.from_address(params).cmd
+            if cmd & 0xFFF != self.COMPLETION_EVENT or cmd & PHASE_MASK.SINKING:
+                return False
+            self.drain()
+            return True
+        return super()._element_proc(tag, he, evt, params)
 
     pass
@@ -0,0 +1,308 @@
+"""Process-wide executors for the `threading`, `promise` and `process` script handlers."""
+
+import time
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    from concurrent.futures import InvalidStateError
+except ImportError:
+    # Python < 3.8 doesn't raise it for a cancelled future
+    InvalidStateError = RuntimeError
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+
+class ExecutorBusy(RuntimeError):
+    """Executor queue or handler concurrency limit is exhausted."""
+    pass
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded queue, per-handler concurrency limits and queue metrics.
+
+    `on_busy` tells script handlers what to do when the executor is busy:
+    'reject' rejects the promise, 'resolve' resolves it with `busy_value`.
+    """
+
+    def __init__(self, max_workers=None, max_queue=0, on_busy='reject', busy_value='busy'):
+        """Create executor, `max_queue` limits calls waiting for a worker (0 - unlimited)."""
+        if on_busy not in ('reject', 'resolve'):
+            raise ValueError("on_busy must be 'reject' or 'resolve'")
+        self.max_queue = max_queue
+        self.on_busy = on_busy
+        self.busy_value = busy_value
+        self.stats = dict(submitted=0, completed=0, rejected=0, cancelled=0, depth=0, max_depth=0, running=0,
+                          wait_total=0.0, wait_max=0.0)
+        self._pool = self._create_pool(max_workers)
+        self._lock = threading.Lock()
+        self._active = {}           # handler key -> queued and running calls
+        pass
+
+    def submit(self, fn, *args, key=None, limit=None):
+        """Submit call, at most `limit` calls with the same `key` may be queued or running; raise ExecutorBusy if full."""
+        stats = self.stats
+        with self._lock:
+            if self.max_queue and stats['depth'] >= self.max_queue:
+                stats['rejected'] += 1
+                raise ExecutorBusy("executor queue is full")
+            if limit is not None and self._active.get(key, 0) >= limit:
+                stats['rejected'] += 1
+                raise ExecutorBusy("handler concurrency limit is reached")
+            if limit is not None:
+                self._active[key] = self._active.get(key, 0) + 1
+            stats['submitted'] += 1
+            stats['depth'] += 1
+            stats['max_depth'] = max(stats['max_depth'], stats['depth'])
+        try:
+            return self._start(fn, args, key if limit is not None else None)
+        except Exception:
+            self._done(key if limit is not None else None)
+            with self._lock:
+                stats['depth'] -= 1
+            raise
+
+    def mean_wait(self):
+        """Average time in seconds the calls waited in the queue."""
+        started = self.stats['completed'] + self.stats['running']
+        return self.stats['wait_total'] / started if started else 0.0
+
+    def shutdown(self, wait=True):
+        """Shutdown the worker threads."""
+        self._pool.shutdown(wait)
+        pass
+
+    def _create_pool(self, max_workers):
+        return ThreadPoolExecutor(max_workers)
+
+    def _start(self, fn, args, key):
+        fut = self._pool.submit(self._call, fn, args, key, time.monotonic())
+        fut.add_done_callback(lambda fut: fut.cancelled() and self._cancelled(key))
+        return fut
+
+    def _cancelled(self, key):
+        # the call was cancelled while queued, it never runs
+        with self._lock:
+            self.stats['depth'] -= 1
+            self.stats['cancelled'] += 1
+        self._done(key)
+        pass
+
+    def _call(self, fn, args, key, queued):
+        stats = self.stats
+        wait = time.monotonic() - queued
+        with self._lock:
+            stats['depth'] -= 1
+            stats['running'] += 1
+            stats['wait_total'] += wait
+            stats['wait_max'] = max(stats['wait_max'], wait)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                stats['running'] -= 1
+                stats['completed'] += 1
+            self._done(key)
+        pass
+
+    def _done(self, key):
+        if key is None:
+            return
+        with self._lock:
+            n = self._active.get(key, 0) - 1
+            if n > 0:
+                self._active[key] = n
+            else:
+                self._active.pop(key, None)
+        pass
+
+    pass
+
+
+class ProcessExecutor(BoundedExecutor):
+    """Process pool for CPU-bound handlers; large bytes arguments and results are passed through shared memory.
+
+    The calls are not observed while in the worker, so `depth` counts queued and running calls
+    and `running` stays zero; `wait` is still the time until the worker has picked the call up.
+    """
+
+    def __init__(self, max_workers=None, max_queue=0, on_busy='reject', busy_value='busy', context=None, shm_threshold=1 << 20):
+        """Create executor, `context` is a multiprocessing start method ('spawn', 'forkserver'), `shm_threshold` is in bytes."""
+        self.context = context
+        self.shm_threshold = shm_threshold if shared_memory is not None else None
+        super().__init__(max_workers, max_queue, on_busy, busy_value)
+        self.stats['shared'] = 0
+        pass
+
+    def _create_pool(self, max_workers):
+        if self.context is None:
+            return ProcessPoolExecutor(max_workers)
+        import multiprocessing
+        return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context(self.context))
+
+    def _start(self, fn, args, key):
+        blocks = []
+        args = tuple(_share(arg, self.shm_threshold, blocks) for arg in args)
+        self.stats['shared'] += len(blocks)
+        result = Future()
+        queued = time.time()    # the worker clock is compared with it
+        try:
+            fut = self._pool.submit(_process_call, fn, args, self.shm_threshold)
+        except Exception:
+            _release(blocks)
+            raise
+        fut.add_done_callback(lambda fut: self._finish(fut, result, key, queued, blocks))
+        # cancelling the returned future cancels the queued call, the running one is only abandoned
+        result.add_done_callback(lambda result: result.cancelled() and fut.cancel())
+        return result
+
+    def _finish(self, fut, result, key, queued, blocks):
+        _release(blocks)
+        if fut.cancelled():
+            self._cancelled(key)
+            return
+        stats = self.stats
+        wait = None
+        try:
+            started, rv = fut.result()
+            wait = max(0.0, started - queued)
+            if isinstance(rv, _SharedBytes):
+                stats['shared'] += 1
+                rv = _unshare(rv, unlink=True)
+        except BaseException as e:
+            rv, error = None, e
+        else:
+            error = None
+        with self._lock:
+            stats['depth'] -= 1
+            stats['completed'] += 1
+            if wait is not None:
+                stats['wait_total'] += wait
+                stats['wait_max'] = max(stats['wait_max'], wait)
+        self._done(key)
+        try:
+            if error is None:
+                result.set_result(rv)
+            else:
+                result.set_exception(error)
+        except InvalidStateError:
+            pass    # cancelled meanwhile
+        pass
+
+    pass
+
+
+class _SharedBytes:
+    """Bytes payload left in a shared memory block, `size` bytes of it."""
+
+    __slots__ = ('name', 'size')
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        pass
+
+    def __reduce__(self):
+        return (_SharedBytes, (self.name, self.size))
+
+    pass
+
+
+def _share(value, threshold, blocks):
+    # move large bytes to a new shared memory block, the caller owns the block
+    if threshold is None or not isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    size = value.nbytes if isinstance(value, memoryview) else len(value)
+    if size < threshold:
+        return value
+    block = shared_memory.SharedMemory(create=True, size=size)
+    block.buf[:size] = value
+    blocks.append(block)
+    return _SharedBytes(block.name, size)
+
+
+def _unshare(value, unlink=False):
+    # copy bytes out of the shared memory block
+    if not isinstance(value, _SharedBytes):
+        return value
+    block = shared_memory.SharedMemory(name=value.name)
+    try:
+        return bytes(block.buf[:value.size])
+    finally:
+        block.close()
+        if unlink:
+            block.unlink()
+    pass
+
+
+def _release(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+    pass
+
+
+def _process_call(fn, args, threshold):
+    # runs in the worker process
+    started = time.time()
+    rv = fn(*[_unshare(arg) for arg in args])
+    blocks = []
+    rv = _share(rv, threshold, blocks)
+    for block in blocks:
+        # the parent process unlinks it after reading
+        block.close()
+    return started, rv
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def set_executor(name='default', executor=None, process=False, **options):
+    """Register executor by name.
+
+    If `executor` is not given, a new BoundedExecutor is created with `options`,
+    or a ProcessExecutor for `process` or the 'process' name.
+    """
+    if executor is None:
+        executor = (ProcessExecutor if process or name == 'process' else BoundedExecutor)(**options)
+    with _executors_lock:
+        _executors[name] = executor
+    return executor
+
+
+def get_executor(name='default'):
+    """Get executor by name; the 'default' and 'process' ones are created on demand."""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                if name == 'default':
+                    executor = BoundedExecutor()
+                elif name == 'process':
+                    executor = ProcessExecutor()
+                else:
+                    raise KeyError("Unknown executor '%s', see sciter.set_executor()" % name)
+                _executors[name] = executor
+    return executor
+
+
+def executor_stats() -> dict:
+    """Get metrics of all registered executors."""
+    return {name: dict(executor.stats) for name, executor in list(_executors.items()) if hasattr(executor, 'stats')}
+
+
+def shutdown(wait=True):
+    """Shutdown and forget all registered executors."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait)
+    pass
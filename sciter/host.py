@@ -22,6 +22,8 @@ class Host():
         super().__init__()
         self.hwnd = None
         self.root = None
+        self._document = None
+        self._requests = None
         pass
 
     def __call__(self, name, *args):
@@ -134,6 +136,20 @@ class Host():
         sciter.dom.Element._throw_if(ok)
         return sciter.dom.Element(he) if he else None
 
+    @property
+    def document(self):
+        """Get id/name index of the window document (sciter.dom.DocumentIndex) for `document.by_id(name)` lookups."""
+        if self._document is None:
+            self._document = sciter.dom.DocumentIndex(self.hwnd)
+        return self._document
+
+    @property
+    def requests(self):
+        """Get request scheduler of the window (sciter.dom.RequestScheduler) for queued `request_data` calls."""
+        if self._requests is None:
+            self._requests = sciter.dom.RequestScheduler()
+        return self._requests
+
     def eval_script(self, script: str, name=None):
         """Evaluate script in context of current document."""
         rv = sciter.Value()
@@ -0,0 +1,331 @@
+"""Timer scheduler which multiplexes many Python timers onto a single element timer."""
+
+import math
+import time
+
+import sciter.event
+
+from sciter.capi.scbehavior import EVENT_GROUPS
+
+
+class Timer:
+    """Scheduled callback, returned by Scheduler.call_later() and Scheduler.call_every()."""
+
+    __slots__ = ('callback', 'args', 'interval', 'deadline', 'expires', 'armed', 'key', 'coalesce', 'cancelled',
+                 'runs', 'skipped', 'lateness', 'max_lateness', 'total_lateness', '_scheduler')
+
+    def __init__(self, scheduler, callback, args, deadline, interval=None, key=None, coalesce=True):
+        """."""
+        self.callback = callback
+        self.args = args
+        self.interval = interval    # ms for periodic timers, None for one-shot
+        self.deadline = deadline    # ms since scheduler start
+        self.expires = 0            # wheel tick
+        self.armed = False          # is in the wheel
+        self.key = key
+        self.coalesce = coalesce
+        self.cancelled = False
+        self.runs = 0
+        self.skipped = 0            # periodic runs dropped because the timer fell behind
+        self.lateness = 0.0         # ms, of the last run
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self._scheduler = scheduler
+        pass
+
+    def __repr__(self):
+        """Machine-like timer visualization."""
+        kind = 'every %sms' % self.interval if self.interval else 'once'
+        return '<Timer %s %r%s>' % (kind, self.callback, ' cancelled' if self.cancelled else '')
+
+    @property
+    def mean_lateness(self):
+        """Average lateness of the runs in ms."""
+        return self.total_lateness / self.runs if self.runs else 0.0
+
+    def cancel(self):
+        """Cancel the timer."""
+        if not self.cancelled:
+            self._scheduler.cancel(self)
+        return self
+
+    pass
+
+
+class TimerWheel:
+    """Hierarchical timer wheel, stores objects with `expires` tick and `cancelled` flag, maintains their `armed` flag."""
+
+    def __init__(self, bits=8, levels=4):
+        """Create wheel of `levels` levels with 2**bits slots each."""
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.slots = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+        self.tick = 0
+        self.count = 0
+        pass
+
+    def __len__(self):
+        """Number of the active timers."""
+        return self.count
+
+    def add(self, timer):
+        """Add timer, it expires not earlier than on the next tick."""
+        if getattr(timer, 'armed', False):
+            return self
+        self._place(timer, max(timer.expires, self.tick + 1))
+        timer.armed = True
+        self.count += 1
+        return self
+
+    def remove(self, timer):
+        """Forget the cancelled timer, it stays in its slot until the slot expires; no-op for the expired ones."""
+        if not getattr(timer, 'armed', False):
+            return self
+        timer.armed = False
+        self.count = max(0, self.count - 1)
+        return self
+
+    def advance(self, tick: int) -> list:
+        """Move the wheel to the tick, return list of the expired timers."""
+        expired = []
+        bits, mask, slots = self.bits, self.mask, self.slots
+        while self.tick < tick and self.count > len(expired):
+            self.tick += 1
+            t = self.tick
+
+            # cascade the upper levels when the lower one wraps
+            level = 1
+            while level < len(slots) and (t >> (bits * (level - 1))) & mask == 0:
+                index = (t >> (bits * level)) & mask
+                bucket = slots[level][index]
+                slots[level][index] = []
+                for timer in bucket:
+                    if not timer.cancelled:
+                        self._place(timer, max(timer.expires, t))
+                level += 1
+
+            index = t & mask
+            bucket = slots[0][index]
+            if bucket:
+                slots[0][index] = []
+                for timer in bucket:
+                    if timer.cancelled:
+                        continue
+                    if timer.expires <= t:
+                        timer.armed = False
+                        expired.append(timer)
+                    else:
+                        # was clamped to the wheel range
+                        self._place(timer, timer.expires)
+        if self.tick < tick:
+            self.tick = tick
+        self.count = max(0, self.count - len(expired))
+        return expired
+
+    def next_tick(self):
+        """Earliest tick when a timer may expire, None if there are no timers.
+
+        Timers of the upper levels are counted at the tick when their slot cascades,
+        so it's a lower bound: advancing there may expire nothing.
+        """
+        if not self.count:
+            return None
+        best = None
+        for level, wheel in enumerate(self.slots):
+            shift = self.bits * level
+            base = self.tick >> shift
+            for i in range(1, self.mask + 2):
+                block = base + i
+                if best is not None and block << shift >= best:
+                    break
+                if any(not timer.cancelled for timer in wheel[block & self.mask]):
+                    best = block << shift
+                    break
+        return best
+
+    def _place(self, timer, expires):
+        slots = self.slots
+        delta = expires - self.tick
+        level = 0
+        while level < len(slots) - 1 and delta >= 1 << (self.bits * (level + 1)):
+            level += 1
+        # clamp to the wheel range, the timer will be placed again when its slot comes
+        limit = (1 << (self.bits * len(slots))) - 1
+        if delta > limit:
+            expires = self.tick + limit
+        index = (expires >> (self.bits * level)) & self.mask
+        slots[level][index].append(timer)
+        pass
+
+    pass
+
+
+class Scheduler(sciter.event.EventHandler):
+    """Runs many Python timers driven by a single timer of the element."""
+
+    def __init__(self, element, resolution=10):
+        """Attach scheduler to the element, `resolution` is the timers granularity in ms.
+
+        The native timer is set to the time until the next expiry, not fired every `resolution` ms.
+        """
+        self.resolution = resolution
+        self.stats = dict(scheduled=0, fired=0, cancelled=0, coalesced=0, ticks=0)
+        self._target = element
+        self._timer_id = id(self)
+        self._wheel = TimerWheel()
+        self._pending = set()
+        self._keys = {}
+        self._origin = time.monotonic()
+        self._running = False
+        self._interval = None       # ms, of the native timer
+        self._wake = None           # tick, when the native timer fires next
+        super().__init__(element=element, subscription=EVENT_GROUPS.HANDLE_TIMER)
+        pass
+
+    def __len__(self):
+        """Number of the pending timers."""
+        return len(self._wheel)
+
+    def now(self):
+        """Scheduler time in ms."""
+        return (time.monotonic() - self._origin) * 1000.0
+
+    def call_later(self, delay, callback, *args, key=None):
+        """Call `callback(*args)` after `delay` ms, a pending timer with the same `key` is reused instead."""
+        return self._schedule(callback, args, delay, None, key, True)
+
+    def call_every(self, interval, callback, *args, key=None, coalesce=True):
+        """Call `callback(*args)` every `interval` ms; `coalesce` drops the missed runs instead of catching up."""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self._schedule(callback, args, interval, interval, key, coalesce)
+
+    def cancel(self, timer):
+        """Cancel the pending timer."""
+        if timer.cancelled:
+            return self
+        self._forget(timer)
+        self.stats['cancelled'] += 1
+        return self
+
+    def cancel_all(self):
+        """Cancel all pending timers."""
+        for timer in list(self._pending):
+            self.cancel(timer)
+        self._stop()
+        return self
+
+    def close(self):
+        """Cancel all timers and detach from the element."""
+        self.cancel_all()
+        self.detach()
+        return self
+
+    def timer_exception_handler(self, timer, exception):
+        """Called when a timer callback raises, prints the traceback by default."""
+        import traceback
+        traceback.print_exception(type(exception), exception, exception.__traceback__)
+        pass
+
+    def on_timer(self, timerId):
+        """Native timer tick: run the expired timers."""
+        if timerId != self._timer_id:
+            return None
+        self.stats['ticks'] += 1
+        now = self.now()
+        for timer in self._wheel.advance(int(now // self.resolution)):
+            self._run(timer, now)
+        if not len(self._wheel):
+            self._running = False
+            return False    # stop the native timer until a new one is scheduled
+        self._arm()
+        return True
+
+    def _schedule(self, callback, args, delay, interval, key, coalesce):
+        deadline = self.now() + max(0, delay)
+        if key is not None:
+            timer = self._keys.get(key)
+            if timer is not None:
+                # coalesce with the pending timer: keep the earliest deadline and the latest arguments
+                timer.callback, timer.args = callback, args
+                self.stats['coalesced'] += 1
+                if deadline >= timer.deadline or timer.interval:
+                    return timer
+                # the pending one-shot timer comes later, replace it
+                self._forget(timer)
+        timer = Timer(self, callback, args, deadline, interval, key, coalesce)
+        if key is not None:
+            self._keys[key] = timer
+        self._add(timer)
+        self.stats['scheduled'] += 1
+        return timer
+
+    def _add(self, timer):
+        if not len(self._wheel):
+            # sync the idle wheel with the current time
+            self._wheel.advance(int(self.now() // self.resolution))
+        timer.expires = self._tick_of(timer.deadline)
+        self._wheel.add(timer)
+        self._pending.add(timer)
+        if not self._running or timer.expires < self._wake:
+            self._arm()
+        pass
+
+    def _arm(self):
+        # set the native timer to the next expiry
+        tick = self._wheel.next_tick()
+        delay = max(self.resolution, math.ceil(tick * self.resolution - self.now()))
+        self._wake = tick
+        if not self._running or delay != self._interval:
+            self._running = True
+            self._interval = delay
+            self._target.start_timer(delay, self._timer_id)
+        pass
+
+    def _forget(self, timer):
+        timer.cancelled = True
+        self._wheel.remove(timer)
+        self._pending.discard(timer)
+        if timer.key is not None and self._keys.get(timer.key) is timer:
+            del self._keys[timer.key]
+        pass
+
+    def _stop(self):
+        if self._running:
+            self._running = False
+            self._interval = None
+            self._target.stop_timer(self._timer_id)
+        pass
+
+    def _tick_of(self, ms):
+        # round up, so timers never fire early
+        return int(-(-ms // self.resolution))
+
+    def _run(self, timer, now):
+        late = max(0.0, now - timer.deadline)
+        timer.runs += 1
+        timer.lateness = late
+        timer.total_lateness += late
+        timer.max_lateness = max(timer.max_lateness, late)
+        self.stats['fired'] += 1
+        self._pending.discard(timer)
+
+        if timer.interval:
+            # reschedule before the call, so the callback can cancel it
+            deadline = timer.deadline + timer.interval
+            if timer.coalesce and deadline <= now:
+                missed = int((now - deadline) // timer.interval) + 1
+                timer.skipped += missed
+                deadline += missed * timer.interval
+            timer.deadline = deadline
+            self._add(timer)
+        elif timer.key is not None and self._keys.get(timer.key) is timer:
+            del self._keys[timer.key]
+
+        try:
+            timer.callback(*timer.args)
+        except Exception as e:
+            self.timer_exception_handler(timer, e)
+        pass
+
+    pass
@@ -0,0 +1,191 @@
+"""Virtual DOM: describe element trees in Python and patch the real DOM with minimal changes."""
+
+import sciter.dom
+
+
+class VNode:
+    """Lightweight description of a DOM element."""
+
+    __slots__ = ('tag', 'attrs', 'text', 'children', 'key', 'element')
+
+    def __init__(self, tag: str, attrs=None, text=None, children=None, key=None):
+        """Construct node by its tag, attributes, text or children and an optional key."""
+        if text is not None and children:
+            raise ValueError("VNode can have either text or children, not both.")
+        self.tag = tag
+        self.attrs = dict(attrs) if attrs else {}
+        self.text = text
+        self.children = list(children) if children else []
+        self.key = key
+        self.element = None     # sciter.dom.Element once mounted
+        pass
+
+    def __repr__(self):
+        """Machine-like node visualization."""
+        key = '' if self.key is None else ' key=%r' % (self.key,)
+        return '<VNode %s%s>' % (self.tag, key)
+
+    def same(self, other):
+        """Check if this node can be patched in place of `other`."""
+        return self.tag == other.tag and self.key == other.key
+
+    pass
+
+
+def h(tag: str, attrs=None, *children, key=None):
+    """Make VNode: `h('li', {'class': 'item'}, 'text')` or `h('ul', None, h('li'), h('li'))`."""
+    # a single string child becomes the element text
+    if len(children) == 1 and isinstance(children[0], str):
+        return VNode(tag, attrs, text=children[0], key=key)
+    nodes = []
+    for child in children:
+        if isinstance(child, (list, tuple)):
+            nodes.extend(child)
+        elif child is not None:
+            nodes.append(child)
+    for child in nodes:
+        if not isinstance(child, VNode):
+            raise TypeError("VNode children must be VNode objects, mixed text content is not supported")
+    return VNode(tag, attrs, children=nodes, key=key)
+
+
+class Renderer:
+    """Keeps the children of a container element in sync with a list of VNodes."""
+
+    def __init__(self, container: sciter.dom.Element):
+        """Attach renderer to the container element, its existing content is left untouched until the first render."""
+        self.container = container
+        self.children = None
+        self.stats = dict(created=0, deleted=0, moved=0, attributes=0, texts=0)
+        pass
+
+    def render(self, *children):
+        """Render the list of VNodes as children of the container."""
+        nodes = h('#root', None, *children).children
+        if self.children is None:
+            # first render: take over the container
+            self.container.clear()
+            self.children = []
+        self._patch_children(self.container, self.children, nodes)
+        self.children = nodes
+        return self
+
+    def clear(self):
+        """Remove all rendered elements."""
+        if self.children:
+            self._patch_children(self.container, self.children, [])
+        self.children = []
+        return self
+
+    def _create(self, node):
+        el = sciter.dom.Element.create(node.tag, node.text)
+        for name, val in node.attrs.items():
+            el.set_attribute(name, val)
+        for i, child in enumerate(node.children):
+            el.insert(self._create(child), i)
+        node.element = el
+        self.stats['created'] += 1
+        return el
+
+    def _patch(self, old, new):
+        el = old.element
+        new.element = el
+
+        # attributes
+        for name, val in new.attrs.items():
+            if old.attrs.get(name) != val:
+                el.set_attribute(name, val)
+                self.stats['attributes'] += 1
+        for name in old.attrs:
+            if name not in new.attrs:
+                el.remove_attribute(name)
+                self.stats['attributes'] += 1
+
+        # content
+        if new.text is not None:
+            if old.text != new.text or old.children:
+                el.set_text(new.text)
+                self.stats['texts'] += 1
+        else:
+            if old.text:
+                el.clear()
+                self.stats['texts'] += 1
+                old.children = []
+            self._patch_children(el, old.children, new.children)
+        pass
+
+    def _patch_children(self, parent, old, new):
+        # match new children against the old ones: by key or by position among unkeyed ones of the same tag
+        keyed = {}
+        unkeyed = {}
+        for node in old:
+            if node.key is not None:
+                keyed[node.key] = node
+            else:
+                unkeyed.setdefault(node.tag, []).append(node)
+        for nodes in unkeyed.values():
+            nodes.reverse()
+
+        matched = []
+        used = set()
+        for node in new:
+            if node.key is not None:
+                prev = keyed.get(node.key)
+                if prev is not None and (prev.tag != node.tag or id(prev) in used):
+                    prev = None
+            else:
+                pool = unkeyed.get(node.tag)
+                prev = pool.pop() if pool else None
+            if prev is not None:
+                used.add(id(prev))
+            matched.append(prev)
+
+        # drop the old elements that have no match
+        current = []
+        for node in old:
+            if id(node) in used:
+                current.append(node.element)
+            else:
+                node.element.destroy()
+                node.element = None
+                self.stats['deleted'] += 1
+
+        # patch matched elements in place, create the missing ones
+        for node, prev in zip(new, matched):
+            if prev is not None:
+                self._patch(prev, node)
+            else:
+                self._create(node)
+
+        # reorder: `current` mirrors the actual children order of `parent`
+        target = {id(node.element): i for i, node in enumerate(new)}
+        for i, node in enumerate(new):
+            el = node.element
+            if i < len(current) and current[i] is el:
+                continue
+            pos = _index_of(current, el)
+            if pos < 0:
+                # new element
+                parent.insert(el, i)
+                current.insert(i, el)
+                continue
+            occupant = current[i]
+            if target.get(id(occupant)) == pos:
+                # two elements exchanged their places
+                el.swap(occupant)
+                current[i], current[pos] = el, occupant
+            else:
+                parent.insert(el, i)
+                del current[pos]
+                current.insert(i, el)
+            self.stats['moved'] += 1
+        pass
+
+    pass
+
+
+def _index_of(items, el):
+    for i, item in enumerate(items):
+        if item is el:
+            return i
+    return -1
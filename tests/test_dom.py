@@ -0,0 +1,108 @@
+import io
+import unittest
+
+import sciter
+from sciter.dom import ElementSnapshot, snapshot_diff
+from sciter.capi.scdom import NODE_TYPE
+
+
+def tree(rows):
+    # ul (uid 0) with li children given as (uid, text)
+    return ElementSnapshot(0, 'ul', [], None, 0, [ElementSnapshot(uid, 'li', [], text, 0, []) for uid, text in rows])
+
+
+def flat(rows):
+    return dict(uid=[0] + [uid for uid, _ in rows], text=[None] + [text for _, text in rows],
+                parent=[-1] + [0] * len(rows), depth=[0] + [1] * len(rows))
+
+
+class TestSciterSnapshotDiff(unittest.TestCase):
+
+    def test_01insert_front(self):
+        rows = [(i, 'item') for i in range(1, 1001)]
+        changes = snapshot_diff(tree(rows), tree([(5000, 'new')] + rows))
+        self.assertEqual(changes, [('added', 5000, dict(tag='li', attributes=[], text='new', state=0))])
+        changes = snapshot_diff(flat(rows), flat(rows[1:]))
+        self.assertEqual(changes, [('removed', 1, dict(text='item'))])
+        pass
+
+    def test_02moved(self):
+        rows = [(1, 'a'), (2, 'b'), (3, 'c'), (4, 'd')]
+        changes = snapshot_diff(flat(rows), flat([(4, 'd'), (1, 'a'), (2, 'b'), (3, 'c')]))
+        self.assertEqual(changes, [('moved', 4, ((0, 3), (0, 0)))])
+        old = ElementSnapshot(0, 'div', [], None, 0, [tree([(1, 'a')])._replace(uid=10), tree([])._replace(uid=20)])
+        new = ElementSnapshot(0, 'div', [], None, 0, [tree([])._replace(uid=10), tree([(1, 'a')])._replace(uid=20)])
+        self.assertEqual(snapshot_diff(old, new), [('moved', 1, ((10, 0), (20, 0)))])
+        pass
+
+    def test_03changed(self):
+        changes = snapshot_diff(flat([(1, 'a'), (2, 'b')]), flat([(1, 'a'), (2, 'c')]))
+        self.assertEqual(changes, [('changed', 2, dict(text=('b', 'c')))])
+        self.assertEqual(snapshot_diff(tree([(1, 'a')]), tree([(1, 'a')])), [])
+        pass
+
+    def test_04fields_mismatch(self):
+        with self.assertRaises(ValueError):
+            snapshot_diff(flat([(1, 'a')]), tree([(1, 'a')]))
+        with self.assertRaises(ValueError):
+            snapshot_diff(dict(uid=[0], tag=['ul'], parent=[-1], depth=[0]), flat([]))
+        pass
+
+
+def texts(element):
+    return [child.get_text() for child in element]
+
+
+class TestSciterElement(unittest.TestCase):
+
+    def test_01write_html_chunked(self):
+        root = sciter.Element.create('div')
+        root.set_attribute('class', 'list')
+        root.set_html(b'text &amp; x &lt; y<style>a > b { color: red }</style><p>one</p><script>if (a < b) {}</script>tail')
+        for outer in (True, False):
+            buf = io.BytesIO()
+            size = root.write_html(buf, outer, chunked=True)
+            self.assertEqual(buf.getvalue(), root.get_html(outer).encode('utf-8'))
+            self.assertEqual(size, len(buf.getvalue()))
+        pass
+
+    def test_02sort_children(self):
+        root = sciter.Element.create('ul')
+        root.set_html(b'<li>c</li><li>a</li><li>d</li><li>b</li>')
+        root.sort_children(lambda e: e.get_text())
+        self.assertEqual(texts(root), ['a', 'b', 'c', 'd'])
+        root.sort_children(lambda e: e.get_text(), reverse=True)
+        self.assertEqual(texts(root), ['d', 'c', 'b', 'a'])
+        root.sort_children(lambda e: e.get_text(), start=1, end=3)
+        self.assertEqual(texts(root), ['d', 'b', 'c', 'a'])
+        pass
+
+    def test_03sort_children_errors(self):
+        root = sciter.Element.create('ul')
+        root.set_html(b'<li>1</li><li>x</li><li>2</li>')
+        with self.assertRaises(ValueError):
+            root.sort_children(lambda e: int(e.get_text()))
+        with self.assertRaises(TypeError):
+            root.sort_children(lambda e: int(e.get_text()) if e.get_text().isdigit() else e.get_text())
+        self.assertEqual(sorted(texts(root)), ['1', '2', 'x'])
+        pass
+
+    def test_04walk(self):
+        root = sciter.Element.create('div')
+        root.set_html(b'a<p>b<!--c--><span>d</span></p>e')
+        node = root._as_node()
+        self.assertEqual((len(root), len(node)), (1, 3))
+        self.assertEqual([child.get_type() for child in node], [NODE_TYPE.NT_TEXT, NODE_TYPE.NT_ELEMENT, NODE_TYPE.NT_TEXT])
+        self.assertEqual(node[-1].get_text(), 'e')
+        kinds = [child.get_type() for child in node.walk()]
+        self.assertEqual(kinds, [NODE_TYPE.NT_TEXT, NODE_TYPE.NT_ELEMENT, NODE_TYPE.NT_TEXT, NODE_TYPE.NT_COMMENT,
+                                 NODE_TYPE.NT_ELEMENT, NODE_TYPE.NT_TEXT, NODE_TYPE.NT_TEXT])
+        self.assertEqual([child.get_text() for child in node.walk(NODE_TYPE.NT_TEXT)], ['a', 'b', 'd', 'e'])
+        self.assertEqual([child.to_element().get_tag() for child in node.walk(NODE_TYPE.NT_ELEMENT)], ['p', 'span'])
+        self.assertEqual(root.text_content(), 'abde')
+        self.assertEqual(root.text_content(include_comments=True), 'abcde')
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+import types
+import ctypes
+import unittest
+import unittest.mock
+
+import sciter
+import sciter.event
+from sciter.event import throttle, debounce, coalesce
+from sciter.capi.scbehavior import EVENT_GROUPS, BEHAVIOR_EVENTS, PHASE_MASK, BEHAVIOR_EVENT_PARAMS, KEY_PARAMS, SCRIPTING_METHOD_PARAMS
+from sciter.capi.scbehavior import TIMER_PARAMS
+
+
+def call(handler, name, *args):
+    # script call as the engine does it, returns (handled, result)
+    argc, argv, _ = sciter.Value.pack_args(*args)
+    params = SCRIPTING_METHOD_PARAMS()
+    params.name = name.encode('utf-8')
+    params.argv = argv._as_parameter_
+    params.argc = argc
+    handled = handler._on_script_call(params)
+    return handled, sciter.Value(params.result).get_value() if handled else None
+
+
+class Plain(sciter.EventHandler):
+    pass
+
+
+class Keys(sciter.EventHandler):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        pass
+
+    def on_key(self, params):
+        self.calls.append(params.key_code)
+        return True
+
+    def on_event(self, source, target, code, phase, reason):
+        self.calls.append((code, phase, reason))
+        return False
+
+    pass
+
+
+class KeysAndSize(Keys):
+
+    def on_size(self):
+        self.calls.append('size')
+        pass
+
+    pass
+
+
+class Calls(sciter.EventHandler):
+
+    @sciter.script
+    def add(self, a, b):
+        return a + b
+
+    @sciter.script('Multiply')
+    def mul(self, a, b):
+        return a * b
+
+    @sciter.script
+    @staticmethod
+    def above(a):
+        return -a
+
+    @staticmethod
+    @sciter.script
+    def below(a):
+        return -a
+
+    def plain(self):
+        return 'plain'
+
+    pass
+
+
+class MoreCalls(Calls):
+
+    @sciter.script
+    def sub(self, a, b):
+        return a - b
+
+    pass
+
+
+class Target:
+    """Records the element timers started by the deferred methods."""
+
+    def __init__(self):
+        self.timers = []
+
+    def start_timer(self, ms, timer_id):
+        self.timers.append((ms, timer_id))
+
+    def stop_timer(self, timer_id):
+        pass
+
+
+class Deferred(sciter.EventHandler):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        pass
+
+    @throttle(100)
+    def scrolled(self, pos):
+        self.calls.append(pos)
+        pass
+
+    @debounce(50)
+    def typed(self, text):
+        self.calls.append(text)
+        pass
+
+    @coalesce()
+    def on_key(self, params):
+        self.calls.append(params)
+        return True
+
+    pass
+
+
+class DeferredOverride(Deferred):
+
+    @throttle(100)
+    def scrolled(self, pos):
+        self.calls.append(-pos)
+        super().scrolled(pos)
+        pass
+
+    pass
+
+
+class TestSciterEventRouting(unittest.TestCase):
+
+    def test_01subscription(self):
+        self.assertEqual(Plain._default_subscription(), sciter.EventHandler.DEFAULT_EVENTS)
+        self.assertEqual(Keys._default_subscription(), sciter.EventHandler.DEFAULT_EVENTS | EVENT_GROUPS.HANDLE_KEY)
+        self.assertEqual(KeysAndSize._default_subscription(), Keys._default_subscription() | EVENT_GROUPS.HANDLE_SIZE)
+        self.assertEqual(Keys().subscription, Keys._default_subscription())
+        pass
+
+    def test_02routes(self):
+        overridable = {EVENT_GROUPS.HANDLE_DATA_ARRIVED, EVENT_GROUPS.HANDLE_DRAW, EVENT_GROUPS.HANDLE_MOUSE, EVENT_GROUPS.HANDLE_KEY,
+                       EVENT_GROUPS.HANDLE_FOCUS, EVENT_GROUPS.HANDLE_SCROLL, EVENT_GROUPS.HANDLE_TIMER, EVENT_GROUPS.HANDLE_SIZE}
+        self.assertEqual(set(Plain._routing_table()) & overridable, set())
+        self.assertEqual(set(Keys._routing_table()) & overridable, {EVENT_GROUPS.HANDLE_KEY})
+        self.assertEqual(set(KeysAndSize._routing_table()) & overridable, {EVENT_GROUPS.HANDLE_KEY, EVENT_GROUPS.HANDLE_SIZE})
+        self.assertIn(EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT, Plain._routing_table())
+        pass
+
+    def test_03cached_per_class(self):
+        self.assertIs(Keys._routing_table(), Keys._routing_table())
+        self.assertIsNot(Keys._routing_table(), KeysAndSize._routing_table())
+        self.assertIn('_sciter_routes', Keys.__dict__)
+        self.assertNotIn('_sciter_routes', sciter.EventHandler.__dict__)
+        pass
+
+    def test_04route_params(self):
+        h = KeysAndSize()
+        table = KeysAndSize._routing_table()
+        params = KEY_PARAMS()
+        params.key_code = 65
+        self.assertTrue(table[EVENT_GROUPS.HANDLE_KEY](h, None, ctypes.addressof(params)))
+        self.assertFalse(table[EVENT_GROUPS.HANDLE_SIZE](h, None, None))
+        self.assertEqual(h.calls, [65, 'size'])
+        pass
+
+    def test_05on_event_codes(self):
+        h = Keys()
+        route = Keys._routing_table()[EVENT_GROUPS.HANDLE_BEHAVIOR_EVENT]
+        params = BEHAVIOR_EVENT_PARAMS()
+        params.cmd = BEHAVIOR_EVENTS.BUTTON_CLICK | PHASE_MASK.SINKING
+        params.reason = 2
+        route(h, None, ctypes.addressof(params))
+        params.cmd = 0xABC
+        route(h, None, ctypes.addressof(params))
+        (code, phase, reason), (unknown, bubbling, _) = h.calls
+        self.assertIs(code, BEHAVIOR_EVENTS.BUTTON_CLICK)
+        self.assertIs(phase, PHASE_MASK.SINKING)
+        self.assertEqual(reason, 2)
+        self.assertEqual(unknown, 0xABC)
+        self.assertNotIsInstance(unknown, BEHAVIOR_EVENTS)
+        self.assertIs(bubbling, PHASE_MASK.BUBBLING)
+        pass
+
+
+class TestSciterDispatch(unittest.TestCase):
+
+    def test_01named(self):
+        h = Calls()
+        self.assertEqual(call(h, 'add', 2, 3), (True, 5))
+        self.assertEqual(call(h, 'Multiply', 2, 3), (True, 6))
+        self.assertEqual(call(h, 'mul', 2, 3), (False, None))
+        self.assertEqual(call(h, 'plain'), (False, None))
+        self.assertEqual(Calls._dispatch_table(True), dict(add='add', Multiply='mul', above='above', below='below'))
+        pass
+
+    def test_02subclass_table(self):
+        self.assertNotIn('sub', Calls._dispatch_table(True))
+        self.assertEqual(MoreCalls._dispatch_table(True)['sub'], 'sub')
+        self.assertIsNot(Calls.__dict__['_sciter_dispatch_tables'], MoreCalls.__dict__['_sciter_dispatch_tables'])
+        self.assertEqual(call(MoreCalls(), 'sub', 5, 3), (True, 2))
+        self.assertEqual(call(Calls(), 'sub', 5, 3), (False, None))
+        pass
+
+    def test_03register_handler(self):
+        h = Calls()
+        h.register_handler('twice', sciter.script(lambda a: a * 2))
+        h.set_dispatch_options(require_attribute=False)
+        self.assertEqual(call(h, 'twice', 4), (True, 8))
+        self.assertEqual(call(h, 'plain'), (True, 'plain'))
+        h.register_handler('twice', None)
+        self.assertEqual(call(h, 'twice', 4), (False, None))
+        pass
+
+    def test_04dynamic_handlers(self):
+        h = Calls()
+        h.set_dispatch_options(dynamic_handlers=True)
+        self.assertEqual(call(h, 'late', 1), (False, None))
+        h.late = sciter.script(lambda a: a + 1)
+        self.assertEqual(call(h, 'late', 1), (True, 2))
+        h.late = lambda a: a + 1
+        self.assertEqual(call(h, 'late', 1), (False, None))
+        pass
+
+    def test_05staticmethod_order(self):
+        h = Calls()
+        self.assertEqual(call(h, 'above', 1), (True, -1))
+        self.assertEqual(call(h, 'below', 1), (True, -1))
+        self.assertEqual(Calls.above(1), Calls.below(1))
+        pass
+
+
+class TestSciterDeferred(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = 0.0
+        patcher = unittest.mock.patch.object(sciter.event, 'time', types.SimpleNamespace(monotonic=lambda: self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handler = Deferred()
+        self.target = self.handler.element = Target()
+
+    def tearDown(self):
+        self.handler.element = None
+
+    def fire(self):
+        # the last started timer expires
+        params = TIMER_PARAMS()
+        params.timerId = self.target.timers[-1][1]
+        return Deferred._routing_table()[EVENT_GROUPS.HANDLE_TIMER](self.handler, None, ctypes.addressof(params))
+
+    def test_01throttle(self):
+        h = self.handler
+        for pos in (1, 2, 3):
+            h.scrolled(pos)
+        self.assertEqual(h.calls, [1])
+        self.clock = 0.04
+        h.scrolled(4)
+        self.assertEqual(len(self.target.timers), 1)
+        self.assertEqual(self.target.timers[0][0], 100)
+        self.assertFalse(self.fire())
+        self.assertEqual(h.calls, [1, 4])
+        self.assertEqual(h.deferred_stats()['Deferred.scrolled'], dict(calls=4, runs=2, dropped=2))
+        pass
+
+    def test_02debounce(self):
+        h = self.handler
+        h.typed('a')
+        self.clock = 0.03
+        h.typed('ab')
+        self.assertEqual(h.calls, [])
+        self.assertEqual([ms for ms, _ in self.target.timers], [50, 50])
+        self.fire()
+        self.assertEqual(h.calls, ['ab'])
+        self.assertEqual(h.deferred_stats()['Deferred.typed'], dict(calls=2, runs=1, dropped=1))
+        pass
+
+    def test_03structure_copied(self):
+        h = self.handler
+        params = KEY_PARAMS()
+        params.key_code = 65
+        self.assertFalse(Deferred._routing_table()[EVENT_GROUPS.HANDLE_KEY](h, None, ctypes.addressof(params)))
+        params.key_code = 0
+        self.fire()
+        self.assertEqual(len(h.calls), 1)
+        self.assertIsNot(h.calls[0], params)
+        self.assertEqual(h.calls[0].key_code, 65)
+        self.assertTrue(Deferred._default_subscription() & EVENT_GROUPS.HANDLE_TIMER)
+        pass
+
+    def test_04override(self):
+        # the override and its super() method are throttled separately
+        h = DeferredOverride()
+        h.element = self.target
+        h.scrolled(1)
+        h.scrolled(2)
+        self.assertEqual(h.calls, [-1, 1])
+        self.assertEqual(sorted(h.deferred_stats()), ['Deferred.scrolled', 'DeferredOverride.scrolled'])
+        h.element = None
+        pass
+
+    def test_05on_draw(self):
+        with self.assertRaises(sciter.SciterError):
+            class Draw(sciter.EventHandler):
+                @coalesce()
+                def on_draw(self, params):
+                    return True
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
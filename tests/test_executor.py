@@ -0,0 +1,92 @@
+import threading
+import unittest
+
+from sciter.executor import BoundedExecutor, ProcessExecutor, ExecutorBusy, set_executor, get_executor, shutdown
+
+
+def reverse(data):
+    return data[::-1]
+
+
+class TestSciterExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.executor = BoundedExecutor(max_workers=1, max_queue=1)
+
+    def tearDown(self):
+        self.gate.set()
+        self.executor.shutdown()
+
+    def test_01queue_limit(self):
+        started = threading.Event()
+        self.executor.submit(lambda: (started.set(), self.gate.wait()))
+        started.wait(1)
+        self.executor.submit(self.gate.wait)
+        with self.assertRaises(ExecutorBusy):
+            self.executor.submit(self.gate.wait)
+        self.assertEqual(self.executor.stats['depth'], 1)
+        self.assertEqual(self.executor.stats['rejected'], 1)
+        pass
+
+    def test_02concurrency_limit(self):
+        executor = BoundedExecutor(max_workers=2)
+        executor.submit(self.gate.wait, key='h', limit=1)
+        with self.assertRaises(ExecutorBusy):
+            executor.submit(self.gate.wait, key='h', limit=1)
+        executor.submit(self.gate.wait, key='other', limit=1)
+        self.gate.set()
+        executor.shutdown()
+        self.assertEqual(executor.stats['completed'], 2)
+        self.assertEqual(executor._active, {})
+        pass
+
+    def test_03result_and_metrics(self):
+        self.gate.set()
+        fut = self.executor.submit(lambda x: x * 2, 21)
+        self.assertEqual(fut.result(1), 42)
+        self.executor.shutdown()
+        stats = self.executor.stats
+        self.assertEqual((stats['submitted'], stats['completed'], stats['depth'], stats['running']), (1, 1, 0, 0))
+        self.assertGreaterEqual(stats['wait_max'], 0.0)
+        pass
+
+    def test_04registry(self):
+        executor = set_executor('test', max_workers=1, on_busy='resolve')
+        self.assertIs(get_executor('test'), executor)
+        self.assertIs(get_executor(), get_executor('default'))
+        with self.assertRaises(KeyError):
+            get_executor('missing')
+        with self.assertRaises(ValueError):
+            BoundedExecutor(on_busy='drop')
+        shutdown()
+        with self.assertRaises(KeyError):
+            get_executor('test')
+        pass
+
+    def test_05process_shared_bytes(self):
+        executor = ProcessExecutor(max_workers=1, shm_threshold=1024)
+        data = bytes(range(256)) * 64
+        try:
+            self.assertEqual(executor.submit(reverse, data).result(30), data[::-1])
+            self.assertEqual(executor.submit(reverse, b'abc').result(30), b'cba')
+        finally:
+            executor.shutdown()
+        self.assertEqual(executor.stats['completed'], 2)
+        self.assertEqual(executor.stats['shared'], 2 if executor.shm_threshold else 0)
+        pass
+
+    def test_06cancel_queued(self):
+        started = threading.Event()
+        self.executor.submit(lambda: (started.set(), self.gate.wait()))
+        started.wait(1)
+        fut = self.executor.submit(self.gate.wait, key='h', limit=1)
+        self.assertTrue(fut.cancel())
+        self.assertEqual(self.executor.stats['cancelled'], 1)
+        self.assertEqual(self.executor.stats['depth'], 0)
+        self.assertEqual(self.executor._active, {})
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
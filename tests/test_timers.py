@@ -0,0 +1,185 @@
+import random
+import unittest
+
+import sciter
+
+from sciter.timers import TimerWheel, Scheduler
+
+
+class Item:
+    def __init__(self, expires):
+        self.expires = expires
+        self.cancelled = False
+
+
+class TestSciterTimers(unittest.TestCase):
+
+    def test_01expire_in_order(self):
+        wheel = TimerWheel(bits=4, levels=3)
+        items = [Item(random.randint(1, 5000)) for _ in range(500)]
+        for item in items:
+            wheel.add(item)
+        self.assertEqual(len(wheel), len(items))
+        fired = []
+        for tick in range(1, 5001):
+            for item in wheel.advance(tick):
+                self.assertEqual(item.expires, tick)
+                fired.append(item)
+        self.assertEqual(len(fired), len(items))
+        self.assertEqual(len(wheel), 0)
+        pass
+
+    def test_02jump(self):
+        wheel = TimerWheel(bits=4, levels=2)
+        items = [Item(t) for t in (3, 17, 300, 1000)]
+        for item in items:
+            wheel.add(item)
+        self.assertEqual(wheel.advance(20), items[:2])
+        self.assertEqual(wheel.advance(999), [items[2]])
+        self.assertEqual(wheel.advance(5000), [items[3]])
+        self.assertEqual(wheel.tick, 5000)
+        pass
+
+    def test_03cancel(self):
+        wheel = TimerWheel()
+        a, b = Item(10), Item(10)
+        wheel.add(a).add(b)
+        b.cancelled = True
+        wheel.remove(b)
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(100), [a])
+        pass
+
+    def test_04past(self):
+        wheel = TimerWheel()
+        wheel.advance(50)
+        item = Item(10)
+        wheel.add(item)
+        self.assertEqual(wheel.advance(51), [item])
+        pass
+
+    def test_05remove_expired(self):
+        wheel = TimerWheel()
+        a, b = Item(10), Item(50)
+        wheel.add(a).add(b)
+        self.assertEqual(wheel.advance(10), [a])
+        wheel.remove(a)
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(50), [b])
+        wheel.remove(b).remove(b)
+        self.assertEqual(len(wheel), 0)
+        pass
+
+    def test_06next_tick(self):
+        wheel = TimerWheel(bits=4, levels=3)
+        self.assertIsNone(wheel.next_tick())
+        items = [Item(random.randint(1, 3000)) for _ in range(50)]
+        for item in items:
+            wheel.add(item)
+        fired = 0
+        while len(wheel):
+            tick = wheel.next_tick()
+            self.assertLessEqual(tick, min(item.expires for item in items if item.armed))
+            self.assertEqual(wheel.advance(tick - 1), [])
+            fired += len(wheel.advance(tick))
+        self.assertEqual(fired, len(items))
+        pass
+
+
+class Target:
+    """Records the native timer calls of the scheduler."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.running = False
+        self.intervals = []
+        self.due = None
+
+    def start_timer(self, ms, timer_id):
+        self.running = True
+        self.intervals.append(ms)
+        self.due = self.clock() + ms
+
+    def stop_timer(self, timer_id):
+        self.running = False
+
+
+class TestSciterScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = 0.0
+        self.scheduler = Scheduler(sciter.Element.create('div'), resolution=10)
+        self.scheduler.now = lambda: self.clock
+        self.target = self.scheduler._target = Target(lambda: self.clock)
+
+    def tearDown(self):
+        self.scheduler.detach()
+
+    def run_until(self, ms):
+        # the native timer fires every `interval` ms since it was (re)started
+        self.wakeups = 0
+        while self.clock < ms:
+            self.clock += 10
+            if self.target.running and self.clock >= self.target.due:
+                self.wakeups += 1
+                self.target.due += self.target.intervals[-1]
+                if not self.scheduler.on_timer(self.scheduler._timer_id):
+                    self.target.running = False
+
+    def test_01cancel_after_fire(self):
+        fired = []
+        first = self.scheduler.call_later(10, fired.append, 10)
+        self.scheduler.call_later(50, fired.append, 50)
+        self.run_until(20)
+        first.cancel()
+        self.assertEqual(len(self.scheduler), 1)
+        self.run_until(100)
+        self.assertEqual(fired, [10, 50])
+        pass
+
+    def test_02cancel_in_callback(self):
+        fired = []
+        timer = self.scheduler.call_later(10, lambda: (fired.append(10), timer.cancel()))
+        self.scheduler.call_later(50, fired.append, 50)
+        self.run_until(100)
+        self.assertEqual(fired, [10, 50])
+        self.assertEqual(len(self.scheduler), 0)
+        pass
+
+    def test_03periodic(self):
+        fired = []
+        timer = self.scheduler.call_every(20, lambda: fired.append(self.clock))
+        self.run_until(100)
+        self.assertEqual(fired, [20, 40, 60, 80, 100])
+        self.assertEqual(len(self.scheduler), 1)
+        timer.cancel()
+        self.assertEqual(len(self.scheduler), 0)
+        self.run_until(200)
+        self.assertEqual(len(fired), 5)
+        self.assertFalse(self.target.running)
+        pass
+
+    def test_04sparse_wakeups(self):
+        fired = []
+        self.scheduler.call_every(60000, lambda: fired.append(self.clock))
+        self.run_until(300000)
+        self.assertEqual(fired, [60000, 120000, 180000, 240000, 300000])
+        # the upper wheel levels wake it up once more when cascading
+        self.assertLessEqual(self.wakeups, 10)
+        pass
+
+    def test_05earlier_timer_rearms(self):
+        fired = []
+        self.scheduler.call_later(5000, fired.append, 5000)
+        self.scheduler.call_later(30, fired.append, 30)
+        self.assertGreater(self.target.intervals[0], 1000)
+        self.assertEqual(self.target.intervals[-1], 30)
+        self.run_until(6000)
+        self.assertEqual(fired, [30, 5000])
+        self.assertLessEqual(self.wakeups, 4)
+        self.assertFalse(self.target.running)
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
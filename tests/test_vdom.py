@@ -0,0 +1,58 @@
+import unittest
+
+import sciter
+from sciter.vdom import h, Renderer
+
+
+def view(items):
+    return [h('li', {'data-id': str(i)}, 'item %d' % i, key=i) for i in items]
+
+
+def html(items):
+    return ''.join('<li data-id="%d">item %d</li>' % (i, i) for i in items)
+
+
+class TestSciterVdom(unittest.TestCase):
+
+    def test_01render(self):
+        root = sciter.Element.create('ul')
+        Renderer(root).render(view([1, 2, 3]))
+        self.assertEqual(root.children_count(), 3)
+        self.assertEqual(root.get_html(False), html([1, 2, 3]))
+        pass
+
+    def test_02keyed_reorder(self):
+        root = sciter.Element.create('ul')
+        r = Renderer(root).render(view([1, 2, 3, 4]))
+        first = r.children[0].element
+        r.render(view([4, 3, 2, 1]))
+        self.assertEqual(root.get_html(False), html([4, 3, 2, 1]))
+        self.assertEqual(r.stats['created'], 4)
+        self.assertEqual(r.stats['deleted'], 0)
+        self.assertEqual(first.index(), 3)
+        pass
+
+    def test_03insert_remove(self):
+        root = sciter.Element.create('ul')
+        r = Renderer(root).render(view([1, 2, 3]))
+        r.render(view([0, 1, 3, 5]))
+        self.assertEqual(root.get_html(False), html([0, 1, 3, 5]))
+        self.assertEqual(r.stats['created'], 5)
+        self.assertEqual(r.stats['deleted'], 1)
+        pass
+
+    def test_04attributes_text(self):
+        root = sciter.Element.create('div')
+        r = Renderer(root).render(h('span', {'a': '1', 'b': '2'}, 'x'))
+        r.render(h('span', {'a': '3'}, 'y'))
+        span = r.children[0].element
+        self.assertEqual(span.attribute('a'), '3')
+        self.assertIsNone(span.attribute('b'))
+        self.assertEqual(span.get_text(), 'y')
+        r.clear()
+        self.assertEqual(root.children_count(), 0)
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()